@@ -0,0 +1,293 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import platform
+import tempfile
+import subprocess as sp
+
+from psutil import NoSuchProcess, Process
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = [
+    "plain", "churn", "features", "baseline", "shuffle", "isolated", "victim"
+]
+
+
+def git(project_dir, *args):
+    sp.run(
+        ["git", *args], cwd=project_dir, check=True, stdout=sp.DEVNULL,
+        stderr=sp.DEVNULL
+    )
+
+
+def write_file(project_dir, file_name, source):
+    with open(os.path.join(project_dir, file_name), "w") as f:
+        f.write(source)
+
+
+def get_source_module(n_funcs, revision):
+    return "".join(
+        f"def func_{i}(x):\n"
+        f"    y = x + {revision if i % (revision + 1) == 0 else 0}\n"
+        f"    return y * 2\n\n\n"
+        for i in range(n_funcs)
+    )
+
+
+def get_test_module(args, file_no, tests):
+    lines = [
+        "import time",
+        "import pytest",
+        "",
+        "import src",
+        "",
+        "from conftest import STATE",
+        "",
+        ""
+    ]
+
+    for test_no, kind, pair_no in tests:
+        lines += [
+            f"def test_{file_no}_{test_no}(resource):",
+            f"    time.sleep({args.test_duration})",
+            f"    assert src.func_{test_no % args.n_funcs}(resource) >= 0",
+        ]
+
+        if kind == "victim":
+            lines.append(f"    assert not STATE.get({pair_no})")
+        elif kind == "polluter":
+            lines.append(f"    STATE[{pair_no}] = True")
+
+        lines += ["", ""]
+
+    return "\n".join(lines)
+
+
+def generate_project(args, project_dir):
+    git(project_dir, "init", "-q")
+    git(project_dir, "config", "user.email", "bench@example.com")
+    git(project_dir, "config", "user.name", "bench")
+
+    for revision in range(args.n_commits):
+        write_file(
+            project_dir, "src.py", get_source_module(args.n_funcs, revision)
+        )
+
+        git(project_dir, "add", "src.py")
+        git(project_dir, "commit", "-q", "-m", f"revision {revision}")
+
+    write_file(
+        project_dir, "conftest.py",
+        "import pytest\n\n\n"
+        "STATE = {}\n\n\n"
+        f"@pytest.fixture(scope=\"{args.fixture_scope}\")\n"
+        "def resource():\n"
+        "    return 1\n"
+    )
+
+    tests = [(i, None, None) for i in range(args.n_tests)]
+
+    for pair_no in range(min(args.n_pairs, args.n_tests // 2)):
+        tests[pair_no] = (pair_no, "victim", pair_no)
+        polluter_no = args.n_tests - 1 - pair_no
+        tests[polluter_no] = (polluter_no, "polluter", pair_no)
+
+    n_files = max(min(args.n_files, args.n_tests), 1)
+    victim_nodeid = None
+
+    for file_no in range(n_files):
+        tests_file = tests[file_no::n_files]
+        file_name = f"test_{file_no}.py"
+
+        write_file(
+            project_dir, file_name, get_test_module(args, file_no, tests_file)
+        )
+
+        for test_no, kind, _ in tests_file:
+            if kind == "victim" and victim_nodeid is None:
+                victim_nodeid = f"{file_name}::test_{file_no}_{test_no}"
+
+    git(project_dir, "add", ".")
+    git(project_dir, "commit", "-q", "-m", "tests")
+    return victim_nodeid
+
+
+def create_db(args, db_file):
+    with open(args.schema_file, "r") as f:
+        schema = f.read()
+
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    with sqlite3.connect(db_file) as con:
+        con.executescript(schema)
+
+
+def get_command(args, mode, db_file, victim_nodeid):
+    command = [
+        sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider"
+    ]
+
+    if mode == "plain":
+        return command
+
+    command += ["-p", "pytest_cannier", "--mode", mode, "--db-file", db_file]
+
+    if mode == "churn":
+        command.append(f"--commit-window={max(args.n_commits - 1, 1)}")
+    elif mode == "isolated":
+        command.append(f"--isolated-reruns={args.isolated_reruns}")
+    elif mode == "victim":
+        command.append(f"--victim-nodeid={victim_nodeid}")
+
+    return command
+
+
+def run_command(command, project_dir):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [REPO_DIR, *filter(None, [env.get("PYTHONPATH")])]
+    )
+
+    start = time.perf_counter()
+
+    proc = sp.Popen(
+        command, cwd=project_dir, env=env, stdout=sp.DEVNULL,
+        stderr=sp.DEVNULL
+    )
+
+    rss_peak = 0
+
+    try:
+        ps_proc = Process(proc.pid)
+
+        while proc.poll() is None:
+            rss_peak = max(rss_peak, ps_proc.memory_info().rss)
+            time.sleep(0.01)
+    except NoSuchProcess:
+        pass
+
+    proc.wait()
+    return time.perf_counter() - start, rss_peak, proc.returncode
+
+
+def prepare_mode(args, mode, project_dir, db_file, victim_nodeid):
+    create_db(args, db_file)
+
+    if mode != "victim":
+        return
+
+    for mode_prep in ["features", "baseline", "shuffle"]:
+        run_command(
+            get_command(args, mode_prep, db_file, victim_nodeid), project_dir
+        )
+
+
+def bench_mode(args, mode, project_dir, victim_nodeid):
+    db_file = os.path.join(project_dir, "bench.sqlite3")
+    walls, rss_peaks, returncodes = [], [], []
+
+    for _ in range(args.repeat):
+        prepare_mode(args, mode, project_dir, db_file, victim_nodeid)
+
+        wall, rss_peak, returncode = run_command(
+            get_command(args, mode, db_file, victim_nodeid), project_dir
+        )
+
+        walls.append(wall)
+        rss_peaks.append(rss_peak)
+        returncodes.append(returncode)
+
+    walls.sort()
+
+    return {
+        "mode": mode, "wall": walls[len(walls) // 2], "walls": walls,
+        "rss_peak": max(rss_peaks), "returncodes": returncodes
+    }
+
+
+def get_revision():
+    proc = sp.run(
+        ["git", "rev-parse", "HEAD"], cwd=REPO_DIR, encoding="UTF-8",
+        stdout=sp.PIPE, stderr=sp.DEVNULL
+    )
+
+    return proc.stdout.strip() or None
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Time pytest-CANNIER modes on a synthetic project."
+    )
+
+    parser.add_argument("--schema-file", required=True)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--n-tests", type=int, default=200)
+    parser.add_argument("--n-files", type=int, default=10)
+    parser.add_argument("--n-funcs", type=int, default=50)
+    parser.add_argument("--n-commits", type=int, default=20)
+    parser.add_argument("--n-pairs", type=int, default=2)
+    parser.add_argument("--test-duration", type=float, default=0.0)
+
+    parser.add_argument(
+        "--fixture-scope", default="function",
+        choices=["function", "module", "session"]
+    )
+
+    parser.add_argument("--isolated-reruns", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    modes = args.modes.split(",")
+
+    with tempfile.TemporaryDirectory() as project_dir:
+        victim_nodeid = generate_project(args, project_dir)
+
+        if victim_nodeid is None and "victim" in modes:
+            modes.remove("victim")
+
+        results = [
+            bench_mode(args, mode, project_dir, victim_nodeid)
+            for mode in modes
+        ]
+
+    plain = next((r for r in results if r["mode"] == "plain"), None)
+
+    for result in results:
+        if plain is None:
+            result["overhead_per_test"] = None
+        else:
+            result["overhead_per_test"] = (
+                (result["wall"] - plain["wall"]) / max(args.n_tests, 1)
+            )
+
+    report = {
+        "revision": get_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            name: value for name, value in vars(args).items()
+            if name not in {"output", "schema_file"}
+        },
+        "results": results
+    }
+
+    output = json.dumps(report, indent=4)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
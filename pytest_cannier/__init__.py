@@ -1,11 +1,6 @@
 import os
 import pytest
 
-from pytest_cannier.rerun import RerunPlugin
-from pytest_cannier.victim import VictimPlugin
-from pytest_cannier.features import FeaturesPlugin
-from pytest_cannier.churn import get_churn, save_churn
-
 
 def pytest_addoption(parser):
     group = parser.getgroup("pytest-cannier")
@@ -19,7 +14,38 @@ def pytest_addoption(parser):
     )
 
     group.addoption(
-        "--victim-nodeid", action="store", dest="victim-nodeid", type=str
+        "--victim-nodeid", action="append", dest="victim-nodeid", type=str
+    )
+
+    group.addoption(
+        "--polluter-search", action="store", default="bisect", 
+        dest="polluter-search", choices=["bisect", "linear"]
+    )
+
+    group.addoption(
+        "--victim-workers", action="store", default=1, 
+        dest="victim-workers", type=int
+    )
+
+    group.addoption(
+        "--max-polluters", action="store", dest="max-polluters", type=int
+    )
+
+    group.addoption(
+        "--victim-budget", action="store", dest="victim-budget", type=float
+    )
+
+    group.addoption(
+        "--features-budget", action="store", dest="features-budget", 
+        type=float
+    )
+
+    group.addoption(
+        "--incremental", action="store_true", dest="incremental",
+    )
+
+    group.addoption(
+        "--series-size", action="store", dest="series-size", type=int
     )
 
     group.addoption(
@@ -32,11 +58,97 @@ def pytest_addoption(parser):
         type=float
     )
 
+    group.addoption(
+        "--isolated-reruns", action="store", default=10, 
+        dest="isolated-reruns", type=int
+    )
+
+    group.addoption(
+        "--test-timeout", action="store", dest="test-timeout", type=float
+    )
+
+    group.addoption(
+        "--split-tracing", action="store_true", dest="split-tracing",
+    )
+
+    group.addoption(
+        "--fork-stats", action="store_true", dest="fork-stats",
+    )
+
+    group.addoption(
+        "--footprint", action="store_true", dest="footprint",
+    )
+
     group.addoption(
         "--mock-flaky", action="store_true", dest="mock-flaky",
     )
 
 
+COMBINED_MODES = {"features", "baseline", "shuffle", "isolated"}
+
+
+def get_plugin(config, mode, db_file):
+    timeout = config.getoption("test-timeout")
+    fork_stats = config.getoption("fork-stats")
+    n_workers = config.getoption("victim-workers")
+
+    if mode in {"victim", "victims"} and n_workers < 1:
+        pytest.exit(
+            "pytest-cannier: --victim-workers must be at least 1.", 
+            pytest.ExitCode.USAGE_ERROR
+        )
+
+    if mode == "features":
+        from pytest_cannier.features import FeaturesPlugin
+
+        return FeaturesPlugin(
+            db_file, config.getoption("poll-rate"), timeout, fork_stats,
+            config.getoption("split-tracing"), 
+            config.getoption("features-budget"), 
+            config.getoption("incremental"), config.getoption("series-size")
+        )
+    elif mode in {"baseline", "shuffle"}:
+        from pytest_cannier.rerun import RerunPlugin
+
+        return RerunPlugin(db_file, mode, config.getoption("footprint"))
+    elif mode == "isolated":
+        from pytest_cannier.isolated import IsolatedPlugin
+
+        return IsolatedPlugin(
+            db_file, config.getoption("isolated-reruns"), timeout, fork_stats
+        )
+    elif mode == "victim":
+        from pytest_cannier.victim import VictimPlugin
+
+        victim_nodeids = config.getoption("victim-nodeid")
+
+        if not victim_nodeids or len(victim_nodeids) > 1:
+            pytest.exit(
+                "pytest-cannier: specify exactly one victim nodeid.", 
+                pytest.ExitCode.USAGE_ERROR
+            )
+
+        return VictimPlugin(
+            db_file, victim_nodeids[0], config.getoption("polluter-search"), 
+            n_workers, config.getoption("footprint"),
+            config.getoption("max-polluters"), 
+            config.getoption("victim-budget"), timeout, fork_stats
+        )
+    elif mode == "victims":
+        from pytest_cannier.victim import MultiVictimPlugin
+
+        return MultiVictimPlugin(
+            db_file, config.getoption("victim-nodeid"), 
+            n_workers, config.getoption("footprint"),
+            timeout, fork_stats
+        )
+    else:
+        pytest.exit(
+            f"pytest-cannier: {mode} is not a valid mode.", 
+            pytest.ExitCode.USAGE_ERROR
+        )
+
+
 def pytest_configure(config):
     mode = config.getoption("mode")
 
@@ -52,26 +164,33 @@ def pytest_configure(config):
         )
 
     if mode == "churn":
+        from pytest_cannier.churn import get_churn, save_churn
+
         save_churn(db_file, get_churn(config.getoption("commit-window")))
         pytest.exit("pytest-cannier: finished", pytest.ExitCode.OK)
 
-    if mode == "features":
-        plugin = FeaturesPlugin(db_file, config.getoption("poll-rate"))
-    elif mode in {"baseline", "shuffle"}:
-        plugin = RerunPlugin(db_file, mode)
-    elif mode == "victim":
-        victim_nodeid = config.getoption("victim-nodeid")
+    modes = mode.split(",")
 
-        if not victim_nodeid:
+    if getattr(config.option, "dist", "no") != "no" or (
+        hasattr(config, "workerinput")
+    ):
+        if modes not in (["baseline"], ["shuffle"]):
             pytest.exit(
-                "pytest-cannier: no victim nodeid specified.", 
+                f"pytest-cannier: {mode} mode does not support pytest-xdist.", 
                 pytest.ExitCode.USAGE_ERROR
             )
 
-        plugin = VictimPlugin(db_file, victim_nodeid)
+    if len(modes) == 1:
+        plugin = get_plugin(config, mode, db_file)
+    elif len(set(modes)) == len(modes) and COMBINED_MODES.issuperset(modes):
+        from pytest_cannier.combined import CombinedPlugin
+
+        plugin = CombinedPlugin(
+            db_file, [get_plugin(config, m, db_file) for m in modes]
+        )
     else:
         pytest.exit(
-            f"pytest-cannier: {mode} is not a valid mode.", 
+            f"pytest-cannier: {mode} is not a valid combination of modes.", 
             pytest.ExitCode.USAGE_ERROR
         )
 
@@ -1,27 +1,110 @@
 import pytest
-import sqlite3
+
+from pytest_cannier.db import run_transaction
+
+
+def add_columns(cur, table, columns):
+    cur.execute(f"pragma table_info({table})")
+    names = {row[1] for row in cur.fetchall()}
+
+    for name, decl in columns:
+        if name not in names:
+            cur.execute(f"alter table {table} add column {name} {decl}")
+
+
+def stage_items(cur, nodeids):
+    cur.execute(
+        "create temp table if not exists stage ("
+        "nodeid text primary key, "
+        "item_id integer)"
+    )
+
+    cur.execute("delete from temp.stage")
+
+    cur.executemany(
+        "insert or ignore into temp.stage (nodeid) "
+        "values (?)",
+        [(nodeid,) for nodeid in nodeids]
+    )
+
+    cur.execute(
+        "insert or ignore into item "
+        "(nodeid, n_runs_features, n_runs_baseline, n_fail_baseline, "
+        "n_runs_shuffle, n_fail_shuffle, n_runs_victim) "
+        "select nodeid, 0, 0, 0, 0, 0, 0 from temp.stage"
+    )
+
+    cur.execute(
+        "update temp.stage "
+        "set item_id = (select id from item where nodeid = stage.nodeid)"
+    )
+
+    cur.execute(
+        "select nodeid, item_id "
+        "from temp.stage"
+    )
+
+    return dict(cur.fetchall())
+
+
+def create_timeout_table(cur):
+    cur.execute(
+        "create table if not exists timeout ("
+        "item_id integer not null, "
+        "mode text not null, "
+        "n_timeouts integer not null, "
+        "primary key (item_id, mode))"
+    )
+
+
+def save_timeouts(cur, mode, timeouts):
+    create_timeout_table(cur)
+    nodeid_to_id = stage_items(cur, timeouts)
+
+    cur.executemany(
+        "insert into timeout "
+        "values (?, ?, ?) "
+        "on conflict (item_id, mode) do update "
+        "set n_timeouts = n_timeouts + excluded.n_timeouts",
+        [(nodeid_to_id[nodeid], mode, n) for nodeid, n in timeouts.items()]
+    )
 
 
 class BasePlugin:
     def __init__(self, db_file):
         self.db_file = db_file
+        self.pages = None
 
     def load_from_db(self, cur):
         raise NotImplementedError
 
     def pytest_sessionstart(self, session):
-        with sqlite3.connect(self.db_file) as con:
-            self.load_from_db(con.cursor())
+        if hasattr(session.config, "workerinput"):
+            return
+
+        run_transaction(self.db_file, self.load_from_db, immediate=False)
 
     def save_to_db(self, cur):
         raise NotImplementedError
 
+    def save_to_workeroutput(self, workeroutput):
+        pass
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.pages is not None:
+            terminalreporter.write_line(self.pages.get_summary())
+
     @pytest.hookimpl(trylast=True)
     def pytest_sessionfinish(self, session, exitstatus):
+        workeroutput = getattr(session.config, "workeroutput", None)
+
+        if workeroutput is not None:
+            self.save_to_workeroutput(workeroutput)
+            return
+
         if exitstatus in {
             pytest.ExitCode.OK, pytest.ExitCode.TESTS_FAILED
         }:
             session.exitstatus = pytest.ExitCode.OK
 
-            with sqlite3.connect(self.db_file) as con:
-                self.save_to_db(con.cursor())
\ No newline at end of file
+            run_transaction(self.db_file, self.save_to_db)
\ No newline at end of file
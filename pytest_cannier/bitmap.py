@@ -0,0 +1,83 @@
+import zlib
+
+from itertools import combinations
+
+
+def create_run_table(cur):
+    cur.execute(
+        "create table if not exists run ("
+        "id integer primary key, "
+        "mode text not null, "
+        "executed blob not null, "
+        "failed blob not null)"
+    )
+
+
+def encode_bitmap(item_ids):
+    data = bytearray((max(item_ids, default=-1) >> 3) + 1)
+
+    for item_id in item_ids:
+        data[item_id >> 3] |= 1 << (item_id & 7)
+
+    return zlib.compress(bytes(data))
+
+
+def decode_bitmap(blob):
+    return [
+        (i << 3) | j for i, byte in enumerate(zlib.decompress(blob)) if byte 
+        for j in range(8) if byte >> j & 1
+    ]
+
+
+def get_run_masks(cur, mode=None):
+    create_run_table(cur)
+
+    if mode is None:
+        cur.execute(
+            "select failed "
+            "from run"
+        )
+    else:
+        cur.execute(
+            "select failed "
+            "from run "
+            "where mode = ?",
+            (mode,)
+        )
+
+    run_masks = {}
+
+    for i, (failed,) in enumerate(cur.fetchall()):
+        for item_id in decode_bitmap(failed):
+            run_masks[item_id] = run_masks.get(item_id, 0) | 1 << i
+
+    return run_masks
+
+
+def get_co_failures(cur, mode=None):
+    run_masks = get_run_masks(cur, mode)
+    co_failures = {}
+
+    for (id_a, mask_a), (id_b, mask_b) in combinations(
+        sorted(run_masks.items()), 2
+    ):
+        n_co_failures = bin(mask_a & mask_b).count("1")
+
+        if n_co_failures:
+            co_failures[id_a, id_b] = n_co_failures
+
+    return co_failures
+
+
+def get_co_failures_with(cur, item_id, mode=None):
+    run_masks = get_run_masks(cur, mode)
+    mask = run_masks.pop(item_id, 0)
+    co_failures = {}
+
+    for id_other, mask_other in run_masks.items():
+        n_co_failures = bin(mask & mask_other).count("1")
+
+        if n_co_failures:
+            co_failures[id_other] = n_co_failures
+
+    return co_failures
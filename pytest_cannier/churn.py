@@ -1,8 +1,33 @@
 import os
 import pytest
-import sqlite3
 import subprocess as sp
 
+from pytest_cannier.db import run_transaction
+
+
+def get_revision():
+    proc = sp.run(
+        ["git", "rev-parse", "HEAD"], encoding="UTF-8", stdout=sp.PIPE, 
+        stderr=sp.PIPE
+    )
+
+    if proc.returncode:
+        return None
+
+    return proc.stdout.strip()
+
+
+def get_changed_files(revision):
+    proc = sp.run(
+        ["git", "--no-pager", "diff", "--name-only", revision], 
+        encoding="UTF-8", stdout=sp.PIPE, stderr=sp.PIPE
+    )
+
+    if proc.returncode:
+        return None
+
+    return set(proc.stdout.splitlines())
+
 
 def get_churn_file(commit_window, file_name):
     l_no = 1
@@ -59,9 +84,7 @@ def get_churn(commit_window):
 
 
 def save_churn(db_file, churn):
-    with sqlite3.connect(db_file) as con:
-        cur = con.cursor()
-        
+    def save(cur):
         cur.execute(
             "update counters "
             "set count_churn = count_churn + 1 "
@@ -95,4 +118,6 @@ def save_churn(db_file, churn):
             "insert or ignore into line "
             "values (?, ?, ?)", 
             params
-        )
\ No newline at end of file
+        )
+
+    run_transaction(db_file, save)
@@ -0,0 +1,94 @@
+import os
+import pytest
+import random
+
+from multiprocessing import Pipe
+
+from pytest_cannier.base import BasePlugin
+from pytest_cannier.fork import prepare_fork
+from pytest_cannier.supervisor import Supervisor, check_child
+
+
+def run_items(session):
+    for i, item in enumerate(session.items):
+        if i + 1 < len(session.items):
+            nextitem = session.items[i + 1]
+        else:
+            nextitem = None
+
+        item.config.hook.pytest_runtest_protocol(item=item, nextitem=nextitem)
+
+        if session.shouldfail:
+            raise session.Failed(session.shouldfail)
+
+        if session.shouldstop:
+            raise session.Interrupted(session.shouldstop)
+
+
+class CombinedPlugin(BasePlugin):
+    def __init__(self, db_file, plugins):
+        super().__init__(db_file)
+        self.plugins = plugins
+
+    def load_from_db(self, cur):
+        for plugin in self.plugins:
+            plugin.load_from_db(cur)
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, session, config, items):
+        self.items = list(items)
+
+    def run_phase(self, session, plugin):
+        pipe_parent, pipe_child = Pipe(duplex=False)
+        pid = os.fork()
+
+        if pid == 0:
+            status = 1
+
+            try:
+                random.seed()
+                session.items = list(self.items)
+                session.config.pluginmanager.register(plugin)
+
+                if hasattr(plugin, "pytest_collection_modifyitems"):
+                    plugin.pytest_collection_modifyitems(
+                        session, session.config, session.items
+                    )
+
+                try:
+                    if hasattr(plugin, "pytest_runtestloop"):
+                        plugin.pytest_runtestloop(session)
+                    else:
+                        run_items(session)
+                except (session.Failed, session.Interrupted):
+                    pass
+
+                pipe_child.send(
+                    {name: getattr(plugin, name) for name in plugin.results}
+                )
+
+                status = 0
+            finally:
+                os._exit(status)
+
+        pipe_child.close()
+        self.supervisor.add(pid, pipe_parent)
+        (_, exitcode, result), = self.supervisor.wait()
+        check_child(exitcode, result)
+
+        for name, value in result.items():
+            setattr(plugin, name, value)
+
+    def pytest_runtestloop(self, session):
+        self.supervisor = Supervisor()
+        prepare_fork(self.items)
+
+        for plugin in self.plugins:
+            self.run_phase(session, plugin)
+
+        self.supervisor.close()
+        return True
+
+    def save_to_db(self, cur):
+        for plugin in self.plugins:
+            plugin.save_to_db(cur)
@@ -0,0 +1,48 @@
+import time
+import random
+import sqlite3
+
+
+BUSY_TIMEOUT = 60
+MAX_RETRIES = 8
+BACKOFF = 0.05
+
+
+def connect(db_file):
+    con = sqlite3.connect(
+        db_file, timeout=BUSY_TIMEOUT, isolation_level=None
+    )
+
+    con.execute("pragma journal_mode = wal")
+    con.execute("pragma synchronous = normal")
+    con.execute("pragma temp_store = memory")
+    con.execute("pragma cache_size = -65536")
+    return con
+
+
+def is_locked(e):
+    message = str(e)
+    return "locked" in message or "busy" in message
+
+
+def run_transaction(db_file, func, immediate=True):
+    for attempt in range(MAX_RETRIES):
+        con = None
+
+        try:
+            con = connect(db_file)
+            con.execute("begin immediate" if immediate else "begin")
+            result = func(con.cursor())
+            con.execute("commit")
+            return result
+        except sqlite3.OperationalError as e:
+            if not is_locked(e) or attempt == MAX_RETRIES - 1:
+                raise
+        finally:
+            if con is not None:
+                if con.in_transaction:
+                    con.execute("rollback")
+
+                con.close()
+
+        time.sleep(random.uniform(0, BACKOFF * 2 ** attempt))
@@ -0,0 +1,234 @@
+import os
+import ast
+import json
+import mmap
+import struct
+import argparse
+
+from array import array
+
+from pytest_cannier.db import connect
+
+
+MAGIC = b"\x93NUMPY\x01\x00"
+HEADER_LEN = 128
+CHUNK_SIZE = 65536
+TYPECODES = {"<i8": "q", "<f8": "d"}
+LABELS = ["n_polluters", "n_victims"]
+
+
+def get_header(descr, n_rows):
+    header = repr(
+        {"descr": descr, "fortran_order": False, "shape": (n_rows,)}
+    )
+
+    header = header.ljust(HEADER_LEN - len(MAGIC) - 3) + "\n"
+    return MAGIC + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+def read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a version 1.0 npy file")
+
+    header_len, = struct.unpack("<H", f.read(2))
+    header = ast.literal_eval(f.read(header_len).decode("latin1"))
+    return header["descr"], header["shape"][0], len(MAGIC) + 2 + header_len
+
+
+def get_itemsize(descr):
+    if descr.startswith("<U"):
+        return 4 * int(descr[2:])
+
+    return struct.calcsize(TYPECODES[descr])
+
+
+def encode_values(descr, values):
+    if descr.startswith("<U"):
+        itemsize = get_itemsize(descr)
+
+        return b"".join(
+            value.encode("utf-32-le").ljust(itemsize, b"\0")
+            for value in values
+        )
+
+    return array(TYPECODES[descr], values).tobytes()
+
+
+class ColumnWriter:
+    def __init__(self, path, descr, n_rows=0):
+        self.descr = descr
+        self.n_rows = n_rows
+        self.f = open(path, "r+b" if n_rows else "w+b")
+        self.f.truncate(HEADER_LEN + n_rows * get_itemsize(descr))
+        self.f.seek(0, os.SEEK_END)
+
+    def append(self, values):
+        self.f.write(encode_values(self.descr, values))
+        self.n_rows += len(values)
+
+    def close(self):
+        self.f.seek(0)
+        self.f.write(get_header(self.descr, self.n_rows))
+        self.f.close()
+
+
+def open_column(path):
+    with open(path, "rb") as f:
+        descr, n_rows, offset = read_header(f)
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(buf)[offset:offset + n_rows * get_itemsize(descr)]
+
+    if descr.startswith("<U"):
+        itemsize = get_itemsize(descr)
+
+        return [
+            view[i:i + itemsize].tobytes().decode("utf-32-le").rstrip("\0")
+            for i in range(0, len(view), itemsize)
+        ]
+
+    return view.cast(TYPECODES[descr])
+
+
+def get_column_names(cur, table):
+    cur.execute(f"pragma table_info({table})")
+    return [row[1] for row in cur.fetchall()]
+
+
+def load_manifest(export_dir):
+    try:
+        with open(os.path.join(export_dir, "manifest.json"), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_manifest(export_dir, manifest):
+    path = os.path.join(export_dir, "manifest.json")
+
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=4)
+
+    os.replace(path + ".tmp", path)
+
+
+def export_features(cur, export_dir, manifest):
+    names = get_column_names(cur, "features")
+    descrs = ["<i8"] + ["<f8"] * (len(names) - 1)
+    last_rowid = n_rows = 0
+
+    if manifest and manifest["features"]["columns"] == names:
+        last_rowid = manifest["features"]["last_rowid"]
+        n_rows = manifest["features"]["n_rows"]
+
+    cur.execute(
+        "select max(rowid) "
+        "from features"
+    )
+
+    if (cur.fetchone()[0] or 0) < last_rowid:
+        last_rowid = n_rows = 0
+
+    os.makedirs(os.path.join(export_dir, "features"), exist_ok=True)
+
+    writers = [
+        ColumnWriter(
+            os.path.join(export_dir, "features", name + ".npy"), descr, n_rows
+        )
+        for name, descr in zip(names, descrs)
+    ]
+
+    cur.execute(
+        "select rowid, * "
+        "from features "
+        "where rowid > ? "
+        "order by rowid",
+        (last_rowid,)
+    )
+
+    n_rows_new = 0
+
+    while True:
+        rows = cur.fetchmany(CHUNK_SIZE)
+
+        if not rows:
+            break
+
+        last_rowid = rows[-1][0]
+        n_rows_new += len(rows)
+
+        for writer, values in zip(writers, list(zip(*rows))[1:]):
+            if writer.descr == "<f8":
+                values = [float("nan") if v is None else v for v in values]
+
+            writer.append(values)
+
+    for writer in writers:
+        writer.close()
+
+    return n_rows_new, {
+        "columns": names, "last_rowid": last_rowid,
+        "n_rows": n_rows + n_rows_new
+    }
+
+
+def export_items(cur, export_dir):
+    names = get_column_names(cur, "item")
+
+    cur.execute(
+        "select item.*, "
+        "(select count(*) from dependency where victim_id = item.id), "
+        "(select count(*) from dependency where polluter_id = item.id) "
+        "from item "
+        "order by id"
+    )
+
+    columns = list(zip(*cur.fetchall())) or [()] * (len(names) + 2)
+    os.makedirs(os.path.join(export_dir, "item"), exist_ok=True)
+
+    for name, values in zip(names + LABELS, columns):
+        if name == "nodeid":
+            descr = f"<U{max(map(len, values), default=1)}"
+        else:
+            descr = "<i8"
+
+        writer = ColumnWriter(
+            os.path.join(export_dir, "item", name + ".npy"), descr
+        )
+
+        writer.append(values)
+        writer.close()
+
+    return {"columns": names + LABELS, "n_rows": len(columns[0])}
+
+
+def export(db_file, export_dir, full=False):
+    os.makedirs(export_dir, exist_ok=True)
+    manifest = None if full else load_manifest(export_dir)
+    con = connect(db_file)
+
+    try:
+        con.execute("begin")
+        cur = con.cursor()
+        n_rows_new, features = export_features(cur, export_dir, manifest)
+        items = export_items(cur, export_dir)
+        con.execute("rollback")
+    finally:
+        con.close()
+
+    save_manifest(export_dir, {"features": features, "item": items})
+    return n_rows_new
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pytest_cannier.export")
+    parser.add_argument("db_file")
+    parser.add_argument("export_dir")
+    parser.add_argument("--full", action="store_true")
+    args = parser.parse_args(argv)
+    n_rows_new = export(args.db_file, args.export_dir, args.full)
+    print(f"pytest-cannier: exported {n_rows_new} new features rows.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,13 @@
-import gc
 import os
 import re
 import ast
+import sys
+import mmap
 import time
 import pytest
 import inspect
-import sqlite3
 
+from array import array
 from radon import metrics
 from importlib import util
 from coverage import Coverage
@@ -14,11 +15,105 @@ from distutils import sysconfig
 from multiprocessing import Event, Pipe
 from psutil import AccessDenied, Process
 
-from pytest_cannier.base import BasePlugin
+from pytest_cannier.db import run_transaction
+from pytest_cannier.base import BasePlugin, save_timeouts, stage_items
+from pytest_cannier.churn import get_changed_files, get_revision
+from pytest_cannier.fork import PageCounter, prepare_fork
+from pytest_cannier.footprint import is_local_file
+from pytest_cannier.results import ResultTable
+from pytest_cannier.schedule import create_duration_table
+from pytest_cannier.series import Series, create_series_table
+from pytest_cannier.supervisor import TIMED_OUT, Supervisor, check_child
 
 
 WHITESPACE_RE = re.compile("(^[ \t]*)(?:[^ \t\n])")
 PYTHON_LIB = sysconfig.get_python_lib(standard_lib=False)
+RESULT_FMT = "qqddqqqq"
+TIME_EXEC = 2
+REQUESTED, LOADED = b"\x01", b"\x02"
+
+
+def create_slowdown_table(cur):
+    cur.execute(
+        "create table if not exists slowdown ("
+        "item_id integer primary key, "
+        "n_samples integer not null, "
+        "mean_slowdown real not null)"
+    )
+
+
+def create_covered_file_table(cur):
+    cur.execute(
+        "create table if not exists covered_file ("
+        "item_id integer not null, "
+        "file_id integer not null, "
+        "primary key (item_id, file_id))"
+    )
+
+
+def create_measured_table(cur):
+    cur.execute(
+        "create table if not exists measured ("
+        "item_id integer primary key, "
+        "revision text not null)"
+    )
+
+
+class ChurnIndex:
+    def __init__(self, db_file, file_ids):
+        self.db_file = db_file
+        self.file_ids = file_ids
+        self.file_names = list(file_ids)
+        self.slots = {name: i for i, name in enumerate(self.file_names)}
+        self.lines = {}
+        self.flags = mmap.mmap(-1, max(len(self.file_names), 1))
+
+    def select_lines(self, cur, file_name):
+        cur.execute(
+            "select l_no, churn_l_no "
+            "from line "
+            "where file_id = ?",
+            (self.file_ids[file_name],)
+        )
+
+        return cur.fetchall()
+
+    def load_file(self, file_name):
+        rows = run_transaction(
+            self.db_file, lambda cur: self.select_lines(cur, file_name), 
+            immediate=False
+        )
+
+        churn_file = array("i", [0]) * (max(r[0] for r in rows) + 1)
+
+        for l_no, churn_l_no in rows:
+            churn_file[l_no] = churn_l_no
+
+        return churn_file
+
+    def get(self, file_name):
+        churn_file = self.lines.get(file_name)
+
+        if churn_file is None and file_name in self.file_ids:
+            churn_file = self.lines[file_name] = self.load_file(file_name)
+            slot = self.slots[file_name]
+
+            if self.flags[slot:slot + 1] != LOADED:
+                self.flags[slot:slot + 1] = REQUESTED
+
+        return churn_file
+
+    def warm(self):
+        slot = self.flags.find(REQUESTED)
+
+        while slot != -1:
+            file_name = self.file_names[slot]
+
+            if file_name not in self.lines:
+                self.lines[file_name] = self.load_file(file_name)
+
+            self.flags[slot:slot + 1] = LOADED
+            slot = self.flags.find(REQUESTED, slot + 1)
 
 
 def get_cumulative_feats(proc):
@@ -48,12 +143,88 @@ def get_coverage_feats(coverage, test_files, churn):
             continue
 
         n_lines_source += len(lines)
-        churn_file = churn.get(file_name_rel, {})
-        n_changes += sum(churn_file.get(l_no, 0) for l_no in lines)
+        churn_file = churn.get(file_name_rel)
+
+        if churn_file is None:
+            continue
+
+        n_changes += sum(
+            churn_file[l_no] for l_no in lines if l_no < len(churn_file)
+        )
 
     return n_lines, n_lines_source, n_changes
 
 
+def get_covered_files(coverage):
+    data = coverage.get_data()
+
+    return [
+        os.path.relpath(file_name) for file_name in data.measured_files()
+        if data.lines(file_name)
+    ]
+
+
+def iter_module_name_prefixes(module_name):
+    parts = module_name.split(".")
+
+    for i in range(1, len(parts) + 1):
+        yield ".".join(parts[:i])
+
+
+def iter_imported_module_names(module, tree):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for n in node.names:
+                yield from iter_module_name_prefixes(n.name)
+        elif isinstance(node, ast.ImportFrom):
+            name = "." * node.level + (node.module or "")
+
+            try:
+                base = util.resolve_name(name, module.__package__)
+            except (ImportError, ValueError):
+                continue
+
+            yield from iter_module_name_prefixes(base)
+
+            for n in node.names:
+                yield f"{base}.{n.name}"
+
+
+def get_imported_files(module, cwd):
+    imported = set()
+    seen = set()
+    modules = [module]
+
+    while modules:
+        module = modules.pop()
+        file_name = getattr(module, "__file__", None)
+
+        if module.__name__ in seen or not isinstance(file_name, str):
+            continue
+
+        seen.add(module.__name__)
+        file_name = os.path.abspath(file_name)
+
+        if not is_local_file(file_name, cwd):
+            continue
+
+        imported.add(os.path.relpath(file_name, cwd))
+
+        try:
+            with open(file_name, "rb") as f:
+                tree = ast.parse(f.read())
+        except (OSError, SyntaxError, ValueError):
+            continue
+
+        for module_name in iter_imported_module_names(module, tree):
+            module_imported = sys.modules.get(module_name)
+
+            if module_imported is not None:
+                modules.append(module_imported)
+
+    return imported
+
+
 def get_noncumulative_feats(proc):
     n_threads = proc.num_threads()
     n_children = len(proc.children())
@@ -169,32 +340,130 @@ def get_static_feats(module, varnames, lines, tree):
 
 
 class FeaturesPlugin(BasePlugin):
-    def __init__(self, db_file, poll_rate):
+    results = (
+        "features", "timeouts", "slowdowns", "covered", "carried", 
+        "revision", "series", "truncated"
+    )
+
+    def __init__(
+        self, db_file, poll_rate, timeout=None, fork_stats=False, 
+        split_tracing=False, budget=None, incremental=False, 
+        series_size=None
+    ):
         super().__init__(db_file)
         self.features = {}
+        self.timeouts = {}
+        self.slowdowns = {}
         self.poll_rate = poll_rate
+        self.timeout = timeout
+        self.fork_stats = fork_stats
+        self.split_tracing = split_tracing
+        self.budget = budget
+        self.n_runs = {}
+        self.durations = {}
+        self.deadline = None
+        self.overhead = 0.0
+        self.n_timed = 0
+        self.truncated = False
+        self.incremental = incremental
+        self.measured = {}
+        self.covered = {}
+        self.imported = {}
+        self.carried = set()
+        self.revision = None
+        self.series_size = series_size
+        self.series = {}
 
     def load_from_db(self, cur):
         cur.execute(
-            "select id, file_name "
-            "from file"
+            "select file_name, id "
+            "from file "
+            "where exists (select 1 from line where file_id = file.id)"
+        )
+
+        self.churn = ChurnIndex(self.db_file, dict(cur.fetchall()))
+
+        if self.incremental:
+            self.load_measured(cur)
+
+    def load_budget(self, cur, nodeids):
+        create_duration_table(cur)
+
+        cur.execute(
+            "create temp table if not exists collected ("
+            "nodeid text primary key)"
+        )
+
+        cur.execute("delete from temp.collected")
+
+        cur.executemany(
+            "insert or ignore into temp.collected "
+            "values (?)",
+            [(nodeid,) for nodeid in nodeids]
+        )
+
+        cur.execute(
+            "select nodeid, n_runs_features "
+            "from item join temp.collected using (nodeid)"
+        )
+
+        self.n_runs = dict(cur.fetchall())
+
+        cur.execute(
+            "select nodeid, mean_setup + mean_call + mean_teardown "
+            "from duration "
+            "join item on item.id = duration.item_id "
+            "join temp.collected using (nodeid)"
         )
 
-        id_to_file_name = {
-            file_id: file_name for file_id, file_name in cur.fetchall()
+        self.durations = dict(cur.fetchall())
+
+    def load_measured(self, cur):
+        create_covered_file_table(cur)
+        create_measured_table(cur)
+
+        cur.execute(
+            "select nodeid, revision "
+            "from measured join item on item.id = measured.item_id"
+        )
+
+        self.measured = {
+            nodeid: (revision, set()) for nodeid, revision in cur.fetchall()
         }
 
         cur.execute(
-            "select file_id, l_no, churn_l_no "
-            "from line"
+            "select nodeid, file_name "
+            "from covered_file "
+            "join item on item.id = covered_file.item_id "
+            "join file on file.id = covered_file.file_id"
         )
 
-        self.churn = {}
+        for nodeid, file_name in cur.fetchall():
+            if nodeid in self.measured:
+                self.measured[nodeid][1].add(file_name)
 
-        for file_id, l_no, churn_l_no in cur.fetchall():
-            file_name = id_to_file_name[file_id]
-            churn_file = self.churn.setdefault(file_name, {})
-            churn_file[l_no] = churn_l_no
+    def select_carried(self, items):
+        self.revision = get_revision()
+        changed = {}
+
+        if self.revision is None:
+            return
+
+        for it in items:
+            measured = self.measured.get(it.nodeid)
+
+            if measured is None:
+                continue
+
+            revision, covered = measured
+
+            if revision not in changed:
+                changed[revision] = get_changed_files(revision)
+
+            if changed[revision] is not None and changed[revision].isdisjoint(
+                covered | {it.location[0]}
+            ):
+                self.carried.add(it.nodeid)
 
     @pytest.hookimpl(trylast=True)
     def pytest_collection_modifyitems(self, session, config, items):
@@ -237,112 +506,344 @@ class FeaturesPlugin(BasePlugin):
                 continue
 
             self.static[id(obj)] = module, set(code.co_varnames), lines, tree
+
+            if self.incremental and module.__name__ not in self.imported:
+                self.imported[module.__name__] = get_imported_files(
+                    module, os.getcwd()
+                )
             self.items[it.nodeid] = id(obj)
             items_new.append(it)
 
+        if self.incremental:
+            self.select_carried(items_new)
+
+        if self.budget:
+            run_transaction(
+                self.db_file, 
+                lambda cur: self.load_budget(
+                    cur, [it.nodeid for it in items_new]
+                ),
+                immediate=False
+            )
+
+            items_new.sort(
+                key=lambda it: (
+                    self.n_runs.get(it.nodeid, 0),
+                    self.durations.get(it.nodeid, 0.0)
+                )
+            )
+
         items[:] = items_new
 
-    def pytest_runtestloop(self, session):
-        noncumul_start, noncumul_stop = Event(), Event()
-        pipe_parent, pipe_child = Pipe()
-        gc.disable()
+    def fits_budget(self, it):
+        if self.deadline is None:
+            return True
+
+        estimate = self.durations.get(it.nodeid, 0.0) + self.overhead
+        return time.monotonic() + estimate <= self.deadline
+
+    def update_overhead(self, it, start):
+        duration = self.durations.get(it.nodeid, 0.0)
+        overhead = time.monotonic() - start - duration
+        self.n_timed += 1
+        self.overhead += (max(overhead, 0.0) - self.overhead) / self.n_timed
 
-        for it in session.items:
-            pid = os.fork()
+    def fork_child(self, it, results, i, trace, pipe=None):
+        pid = os.fork()
 
-            if pid == 0:
-                proc = Process()
+        if pid == 0:
+            proc = Process()
 
+            if trace:
                 coverage = Coverage(
                     data_file=None, cover_pylib=False, source=[os.getcwd()]
                 )
 
                 coverage.start()
-                cumul_feats = get_cumulative_feats(proc)
-                noncumul_start.set()
 
-                try:
-                    it.ihook.pytest_runtest_protocol(item=it, nextitem=None)
-                finally:
-                    noncumul_stop.set()
+            cumul_feats = get_cumulative_feats(proc)
 
-                    cumul_feats = [
-                        x - y for x, y in zip(
-                            get_cumulative_feats(proc), cumul_feats
-                        )
-                    ]
+            try:
+                it.ihook.pytest_runtest_protocol(item=it, nextitem=None)
+            finally:
+                self.noncumul_stop.set()
+
+                cumul_feats = [
+                    x - y for x, y in zip(
+                        get_cumulative_feats(proc), cumul_feats
+                    )
+                ]
 
+                if trace:
                     cov_feats = get_coverage_feats(
                         coverage, self.test_files, self.churn
                     )
+                else:
+                    cov_feats = 0, 0, 0
 
-                    pipe_child.send((cumul_feats, cov_feats))
-                    os._exit(0)
+                if pipe is not None:
+                    pipe.send(get_covered_files(coverage))
 
-            proc = Process(pid)
-            noncumul_start.wait()
-            noncumul_feats = get_noncumulative_feats(proc)
+                if self.pages is not None:
+                    self.pages.record(0)
 
-            while not noncumul_stop.wait(self.poll_rate):
-                noncumul_feats = [
-                    max(x, y) for x, y in zip(
-                        get_noncumulative_feats(proc), noncumul_feats
-                    )
-                ]
+                results.write(i, [*cumul_feats, *cov_feats])
+                os._exit(0)
 
-            if proc.wait():
-                pytest.exit(
-                    "pytest-cannier: child process error.", 
-                    pytest.ExitCode.INTERNAL_ERROR
-                )
+        return pid
+
+    def get_covered(self, it, covered):
+        module = self.static[self.items[it.nodeid]][0]
+        covered = set(covered) | self.imported.get(module.__name__, set())
+        test_files = self.test_files - {it.location[0]}
+        return sorted(covered - test_files)
+
+    def run_child(self, it, results, i, trace):
+        if trace and self.incremental:
+            pipe_parent, pipe_child = Pipe(duplex=False)
+        else:
+            pipe_parent = pipe_child = None
 
-            cumul_feats, cov_feats = pipe_parent.recv()
+        pid = self.fork_child(it, results, i, trace, pipe_child)
+        proc = Process(pid)
+
+        if pipe_child is not None:
+            pipe_child.close()
+
+        self.supervisor.add(pid, pipe_parent, self.timeout)
+        noncumul_feats = get_noncumulative_feats(proc)
+        series = Series(self.series_size) if self.series_size else None
+        finished = []
+
+        if series is not None:
+            series.append(noncumul_feats)
+
+        while not finished:
+            finished = self.supervisor.wait(self.poll_rate)
+
+            if finished or self.noncumul_stop.is_set():
+                continue
+
+            sample = get_noncumulative_feats(proc)
+
+            noncumul_feats = [
+                max(x, y) for x, y in zip(sample, noncumul_feats)
+            ]
+
+            if series is not None:
+                series.append(sample)
+
+        (_, exitcode, covered), = finished
+        self.noncumul_stop.clear()
+        self.churn.warm()
+
+        if self.pages is not None:
+            self.pages.collect(0)
+
+        if exitcode == TIMED_OUT:
+            self.timeouts[it.nodeid] = 1
+            return None
+
+        result = results.read(i)
+        check_child(exitcode, result)
+
+        if covered is not None:
+            self.covered[it.nodeid] = self.get_covered(it, covered)
+
+        return result[:5], result[5:], noncumul_feats, series
+
+    def pytest_runtestloop(self, session):
+        self.noncumul_stop = Event()
+        self.supervisor = Supervisor()
+        results = ResultTable(len(session.items), RESULT_FMT)
+
+        if self.split_tracing:
+            results_traced = ResultTable(len(session.items), RESULT_FMT)
+
+        if self.fork_stats:
+            self.pages = PageCounter(1)
+
+        if self.budget:
+            self.deadline = time.monotonic() + self.budget
+
+        prepare_fork(session.items)
+
+        for i, it in enumerate(session.items):
+            if it.nodeid in self.carried:
+                continue
+
+            if not self.fits_budget(it):
+                self.truncated = True
+                continue
+
+            start = time.monotonic()
+            measured = self.run_child(it, results, i, not self.split_tracing)
+
+            if measured is None:
+                continue
+
+            cumul_feats, cov_feats, noncumul_feats, series = measured
+
+            if self.split_tracing:
+                measured = self.run_child(it, results_traced, i, True)
+
+                if measured is None:
+                    continue
+
+                cumul_feats_traced, cov_feats, _, _ = measured
+                time_exec = cumul_feats[TIME_EXEC]
+                time_exec_traced = cumul_feats_traced[TIME_EXEC]
+
+                if time_exec > 0:
+                    self.slowdowns[it.nodeid] = time_exec_traced / time_exec
+
+            self.update_overhead(it, start)
             static_data = self.static[self.items[it.nodeid]]
             static_feats = get_static_feats(*static_data)
             
             self.features[it.nodeid] = [
                 *cumul_feats, *cov_feats, *noncumul_feats, *static_feats
             ]
-            
-            noncumul_start.clear()
-            noncumul_stop.clear()
+
+            if series is not None:
+                self.series[it.nodeid] = series.encode()
+
+        self.supervisor.close()
+        results.close()
+
+        if self.split_tracing:
+            results_traced.close()
+
+        if self.pages is not None:
+            self.pages.close()
 
         return True
 
     def save_to_db(self, cur):
+        if not self.truncated:
+            cur.execute(
+                "update counters "
+                "set count_features = count_features + 1 "
+                "where id = 1"
+            )
+
+        nodeid_to_id = stage_items(cur, self.features)
+
         cur.execute(
-            "update counters "
-            "set count_features = count_features + 1 "
-            "where id = 1"
+            "update item "
+            "set n_runs_features = n_runs_features + 1 "
+            "where id in (select item_id from temp.stage)"
+        )
+
+        cur.executemany(
+            "insert into features "
+            "values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", 
+            [
+                (nodeid_to_id[nodeid], *features_nodeid) 
+                for nodeid, features_nodeid in self.features.items()
+            ]
+        )
+
+        create_slowdown_table(cur)
+
+        cur.executemany(
+            "insert into slowdown "
+            "values (?, 1, ?) "
+            "on conflict (item_id) do update "
+            "set n_samples = n_samples + 1, "
+            "mean_slowdown = mean_slowdown + "
+            "(excluded.mean_slowdown - mean_slowdown) / (n_samples + 1)",
+            [
+                (nodeid_to_id[nodeid], slowdown)
+                for nodeid, slowdown in self.slowdowns.items()
+            ]
+        )
+
+        create_series_table(cur)
+
+        cur.executemany(
+            "insert into series "
+            "values (?, ?, ?, ?, ?, ?)",
+            [
+                (nodeid_to_id[nodeid], *series)
+                for nodeid, series in self.series.items()
+            ]
         )
 
+        if self.incremental:
+            self.save_measured(cur, nodeid_to_id)
+            self.save_carried(cur)
+
+        save_timeouts(cur, "features", self.timeouts)
+
+    def save_measured(self, cur, nodeid_to_id):
+        create_covered_file_table(cur)
+        create_measured_table(cur)
+
         cur.executemany(
-            "insert or ignore into item "
-            "values (null, ?, 0, 0, 0, 0, 0, 0)", 
-            [(nodeid,) for nodeid in self.features]
+            "insert or ignore into file "
+            "values (null, ?)", 
+            [
+                (file_name,) for nodeid in self.features 
+                for file_name in self.covered.get(nodeid, [])
+            ]
         )
 
         cur.execute(
-            "select id, nodeid "
-            "from item"
+            "select file_name, id "
+            "from file"
         )
 
-        nodeid_to_id = {
-            nodeid: item_id for item_id, nodeid in cur.fetchall()
-        }
+        file_name_to_id = dict(cur.fetchall())
 
         cur.executemany(
-            "update item "
-            "set n_runs_features = n_runs_features + 1 "
-            "where id = ?", 
+            "delete from covered_file "
+            "where item_id = ?",
             [(nodeid_to_id[nodeid],) for nodeid in self.features]
         )
 
         cur.executemany(
-            "insert into features "
-            "values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", 
+            "insert into covered_file "
+            "values (?, ?)", 
             [
-                (nodeid_to_id[nodeid], *features_nodeid) 
-                for nodeid, features_nodeid in self.features.items()
+                (nodeid_to_id[nodeid], file_name_to_id[file_name]) 
+                for nodeid in self.features 
+                for file_name in set(self.covered.get(nodeid, []))
             ]
-        )
\ No newline at end of file
+        )
+
+        if self.revision is None:
+            return
+
+        cur.executemany(
+            "insert into measured "
+            "values (?, ?) "
+            "on conflict (item_id) do update "
+            "set revision = excluded.revision",
+            [(nodeid_to_id[nodeid], self.revision) for nodeid in self.features]
+        )
+
+    def save_carried(self, cur):
+        stage_items(cur, self.carried)
+
+        cur.execute(
+            "update item "
+            "set n_runs_features = n_runs_features + 1 "
+            "where id in (select item_id from temp.stage)"
+        )
+
+        cur.execute(
+            "insert into features "
+            "select * from features "
+            "where rowid in ("
+            "select max(rowid) from features "
+            "where item_id in (select item_id from temp.stage) "
+            "group by item_id)"
+        )
+
+        cur.execute(
+            "update measured "
+            "set revision = ? "
+            "where item_id in (select item_id from temp.stage)",
+            (self.revision,)
+        )
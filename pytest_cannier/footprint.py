@@ -0,0 +1,257 @@
+import os
+import sys
+import zlib
+import types
+
+
+ENV_NAMES = {"environ", "getenv", "putenv", "unsetenv", "environb"}
+FILE_EVENTS = {
+    "os.remove", "os.rename", "os.mkdir", "os.rmdir", "shutil.rmtree"
+}
+WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_TRUNC
+SCALAR_TYPES = (int, float, complex, str, bytes, tuple, frozenset, type(None))
+OPAQUE_TYPES = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, 
+    types.MethodType
+)
+
+
+def create_footprint_table(cur):
+    cur.execute(
+        "create table if not exists footprint ("
+        "item_id integer primary key, "
+        "writes blob not null, "
+        "reads blob not null)"
+    )
+
+
+def encode_tokens(tokens):
+    return zlib.compress("\n".join(sorted(tokens)).encode())
+
+
+def decode_tokens(blob):
+    data = zlib.decompress(blob).decode()
+    return set(data.split("\n")) if data else set()
+
+
+def load_footprints(cur):
+    create_footprint_table(cur)
+
+    cur.execute(
+        "select nodeid, writes, reads "
+        "from footprint join item on item.id = footprint.item_id"
+    )
+
+    return {
+        nodeid: (decode_tokens(writes), decode_tokens(reads))
+        for nodeid, writes, reads in cur.fetchall()
+    }
+
+
+def footprints_overlap(writes, reads):
+    for token in writes:
+        if token in reads:
+            return True
+
+        kind, _, name = token.partition(":")
+
+        if kind in {"g", "c", "m"}:
+            if "n:" + name.rpartition(".")[2] in reads:
+                return True
+
+        if kind == "m" and "n:" + name.partition(".")[0] in reads:
+            return True
+
+    return False
+
+
+def is_local_file(file_name, cwd):
+    return (
+        file_name.startswith(cwd + os.sep) and
+        "site-packages" not in file_name
+    )
+
+
+def get_item_key(value):
+    if isinstance(value, SCALAR_TYPES):
+        try:
+            return hash(value)
+        except TypeError:
+            pass
+
+    return id(value)
+
+
+def get_value_key(value):
+    if isinstance(value, dict):
+        items = tuple(
+            (get_item_key(k), get_item_key(v)) for k, v in list(value.items())
+        )
+    elif isinstance(value, (list, set, frozenset, tuple)):
+        items = tuple(get_item_key(v) for v in list(value))
+
+        if isinstance(value, (set, frozenset)):
+            items = tuple(sorted(items))
+    elif isinstance(value, OPAQUE_TYPES) or not hasattr(value, "__dict__"):
+        return id(value)
+    else:
+        try:
+            attrs = list(vars(value).items())
+        except TypeError:
+            return id(value)
+
+        items = tuple((k, get_item_key(v)) for k, v in attrs)
+
+    return id(value), len(items), hash(items)
+
+
+def get_local_modules(cwd):
+    local_modules = {}
+
+    for module_name, module in list(sys.modules.items()):
+        file_name = getattr(module, "__file__", None)
+
+        if isinstance(file_name, str):
+            file_name = os.path.abspath(file_name)
+
+            if is_local_file(file_name, cwd):
+                local_modules[module_name] = module, file_name
+
+    return local_modules
+
+
+def snapshot_globals(local_modules):
+    state = {}
+
+    for module_name, (module, _) in local_modules.items():
+        for name, value in list(vars(module).items()):
+            state[f"g:{module_name}.{name}"] = get_value_key(value)
+
+            if not isinstance(value, type):
+                continue
+
+            if getattr(value, "__module__", None) != module_name:
+                continue
+
+            for attr, attr_value in list(vars(value).items()):
+                key = f"c:{module_name}.{name}.{attr}"
+                state[key] = get_value_key(attr_value)
+
+    return state
+
+
+def iter_changed_keys(before, after):
+    for key in before.keys() | after.keys():
+        if before.get(key) != after.get(key):
+            yield key
+
+
+class FootprintRecorder:
+    def __init__(self):
+        self.cwd = os.getcwd()
+        self.active = False
+        sys.addaudithook(self.audit)
+
+    def start(self):
+        self.local_modules = get_local_modules(self.cwd)
+        self.globals = snapshot_globals(self.local_modules)
+        self.environ = dict(os.environ)
+        self.modules = set(sys.modules)
+        self.files_read = set()
+        self.files_written = set()
+        self.codes = set()
+        self.active = True
+        sys.setprofile(self.profile)
+
+    def profile(self, frame, event, arg):
+        if event == "call":
+            self.codes.add(frame.f_code)
+
+    def add_file(self, path, written):
+        if not isinstance(path, (str, bytes, os.PathLike)):
+            return
+
+        path = os.path.abspath(os.fsdecode(path))
+
+        if not is_local_file(path, self.cwd):
+            return
+
+        path = os.path.relpath(path, self.cwd)
+
+        if written:
+            self.files_written.add(path)
+        else:
+            self.files_read.add(path)
+
+    def audit(self, event, args):
+        if not self.active:
+            return
+
+        self.active = False
+
+        try:
+            if event == "open":
+                path, mode, flags = args
+
+                if mode is None:
+                    written = bool(flags & WRITE_FLAGS)
+                else:
+                    written = any(c in mode for c in "wax+")
+
+                self.add_file(path, written)
+            elif event in FILE_EVENTS:
+                self.add_file(args[0], True)
+
+                if event == "os.rename":
+                    self.add_file(args[1], True)
+        finally:
+            self.active = True
+
+    def stop(self):
+        sys.setprofile(None)
+        self.active = False
+        local_modules = get_local_modules(self.cwd)
+        writes = set()
+
+        globals_after = snapshot_globals({
+            module_name: module_data 
+            for module_name, module_data in local_modules.items()
+            if module_name in self.local_modules
+        })
+
+        writes.update(iter_changed_keys(self.globals, globals_after))
+
+        writes.update(
+            "e:" + key for key in iter_changed_keys(self.environ, os.environ)
+        )
+
+        writes.update(
+            "m:" + module_name
+            for module_name in self.modules.symmetric_difference(sys.modules)
+        )
+
+        writes.update("f:" + path for path in self.files_written)
+        reads = {"f:" + path for path in self.files_read}
+
+        file_name_to_module_name = {
+            file_name: module_name
+            for module_name, (_, file_name) in local_modules.items()
+        }
+
+        for code in self.codes:
+            if ENV_NAMES.intersection(code.co_names):
+                reads.update(
+                    "e:" + c for c in code.co_consts
+                    if isinstance(c, str) and c.isidentifier()
+                )
+
+            module_name = file_name_to_module_name.get(code.co_filename)
+
+            if module_name is None:
+                continue
+
+            reads.add("m:" + module_name)
+            reads.update("n:" + name for name in code.co_names)
+
+        self.codes = set()
+        return writes, reads
@@ -0,0 +1,60 @@
+import gc
+import mmap
+
+from psutil import Process
+
+from pytest_cannier.results import ResultTable
+
+
+def pretouch_item(item):
+    item.nodeid
+    item.location
+    item.ihook
+    item.keywords
+    getattr(item, "obj", None)
+
+
+def prepare_fork(items=()):
+    gc.disable()
+
+    for it in items:
+        pretouch_item(it)
+
+    gc.collect()
+    gc.freeze()
+
+
+def get_private_pages():
+    return Process().memory_full_info().uss // mmap.PAGESIZE
+
+
+class PageCounter:
+    def __init__(self, n_slots):
+        self.results = ResultTable(n_slots, "q")
+        self.counts = []
+
+    def record(self, slot):
+        self.results.write(slot, [get_private_pages()])
+
+    def collect(self, slot):
+        result = self.results.read(slot)
+
+        if result is not None:
+            self.counts.append(result[0])
+
+        self.results.clear(slot)
+
+    def get_summary(self):
+        if not self.counts:
+            return "pytest-cannier: no child processes measured."
+
+        n_pages_mean = sum(self.counts) / len(self.counts)
+        n_pages_max = max(self.counts)
+
+        return (
+            f"pytest-cannier: {len(self.counts)} child processes, "
+            f"{n_pages_mean:.0f} mean and {n_pages_max} max private pages."
+        )
+
+    def close(self):
+        self.results.close()
@@ -0,0 +1,137 @@
+import os
+import pytest
+
+from pytest_cannier.base import (
+    BasePlugin, add_columns, save_timeouts, stage_items
+)
+from pytest_cannier.fork import PageCounter, prepare_fork
+from pytest_cannier.results import ResultTable
+from pytest_cannier.supervisor import TIMED_OUT, Supervisor, check_child
+
+
+PASSED, FAILED, SKIPPED = 0, 1, 2
+
+
+class IsolatedPlugin(BasePlugin):
+    results = ("executed", "failed", "timeouts")
+
+    def __init__(self, db_file, n_reruns, timeout=None, fork_stats=False):
+        super().__init__(db_file)
+        self.executed = {}
+        self.failed = {}
+        self.timeouts = {}
+        self.n_reruns = n_reruns
+        self.timeout = timeout
+        self.fork_stats = fork_stats
+
+    def load_from_db(self, cur):
+        pass
+
+    def pytest_runtestloop(self, session):
+        supervisor = Supervisor()
+        results = ResultTable(len(session.items), "B")
+
+        if self.fork_stats:
+            self.pages = PageCounter(1)
+
+        prepare_fork(session.items)
+
+        for i, it in enumerate(session.items):
+            for _ in range(self.n_reruns):
+                results.clear(i)
+                pid = os.fork()
+
+                if pid == 0:
+                    self.outcome = PASSED
+
+                    try:
+                        it.ihook.pytest_runtest_protocol(
+                            item=it, nextitem=None
+                        )
+                    finally:
+                        if self.pages is not None:
+                            self.pages.record(0)
+
+                        results.write(i, [self.outcome])
+                        os._exit(0)
+
+                supervisor.add(pid, timeout=self.timeout)
+                (_, exitcode, _), = supervisor.wait()
+
+                if self.pages is not None:
+                    self.pages.collect(0)
+
+                if exitcode == TIMED_OUT:
+                    self.timeouts[it.nodeid] = (
+                        self.timeouts.get(it.nodeid, 0) + 1
+                    )
+
+                    continue
+
+                result = results.read(i)
+                check_child(exitcode, result)
+                outcome, = result
+
+                if outcome != SKIPPED:
+                    self.executed[it.nodeid] = (
+                        self.executed.get(it.nodeid, 0) + 1
+                    )
+
+                if outcome == FAILED:
+                    self.failed[it.nodeid] = self.failed.get(it.nodeid, 0) + 1
+
+        supervisor.close()
+        results.close()
+
+        if self.pages is not None:
+            self.pages.close()
+
+        return True
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        result = yield
+        report = result.get_result()
+
+        if report.skipped:
+            self.outcome = SKIPPED
+        elif report.failed:
+            self.outcome = FAILED
+
+    def save_to_db(self, cur):
+        add_columns(
+            cur, "counters",
+            [("count_isolated", "integer not null default 0")]
+        )
+
+        add_columns(
+            cur, "item",
+            [
+                ("n_runs_isolated", "integer not null default 0"),
+                ("n_fail_isolated", "integer not null default 0")
+            ]
+        )
+
+        cur.execute(
+            "update counters "
+            "set count_isolated = count_isolated + 1 "
+            "where id = 1"
+        )
+
+        nodeid_to_id = stage_items(cur, self.executed)
+
+        cur.executemany(
+            "update item "
+            "set n_runs_isolated = n_runs_isolated + ? "
+            "where id = ?",
+            [(n, nodeid_to_id[nodeid]) for nodeid, n in self.executed.items()]
+        )
+
+        cur.executemany(
+            "update item "
+            "set n_fail_isolated = n_fail_isolated + ? "
+            "where id = ?",
+            [(n, nodeid_to_id[nodeid]) for nodeid, n in self.failed.items()]
+        )
+
+        save_timeouts(cur, "isolated", self.timeouts)
@@ -3,47 +3,112 @@ import pytest
 import random
 import sqlite3
 
-from pytest_cannier.base import BasePlugin
+from pytest_cannier.base import BasePlugin, stage_items
+from pytest_cannier.bitmap import create_run_table, encode_bitmap
+from pytest_cannier.schedule import create_duration_table
+from pytest_cannier.footprint import (
+    FootprintRecorder, create_footprint_table, encode_tokens
+)
 
 
 PASSED, FAILED, SKIPPED = 0, 1, 2
+WHEN = ("setup", "call", "teardown")
 
 
 class RerunPlugin(BasePlugin):
-    def __init__(self, db_file, mode):
+    results = ("executed", "failed", "durations", "footprints")
+
+    def __init__(self, db_file, mode, footprint=False):
         super().__init__(db_file)
         self.executed = set()
         self.failed = set()
+        self.durations = {}
+        self.footprints = {}
+        self.running = {}
         self.mode = mode
+        self.seed = random.randrange(2 ** 32)
+        self.recorder = FootprintRecorder() if footprint else None
 
     def load_from_db(self, cur):
         pass
 
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_configure_node(self, node):
+        node.workerinput["cannier_seed"] = self.seed
+
     @pytest.hookimpl(trylast=True)
     def pytest_collection_modifyitems(self, session, config, items):
-        if self.mode == "shuffle":
+        if self.mode != "shuffle":
+            return
+
+        workerinput = getattr(config, "workerinput", None)
+
+        if workerinput is None:
             random.shuffle(items)
+        else:
+            random.Random(workerinput["cannier_seed"]).shuffle(items)
 
     @pytest.hookimpl(hookwrapper=True)
     def pytest_runtest_protocol(self, item, nextitem):
-        self.outcome = PASSED
+        if self.recorder is None:
+            yield
+            return
+
+        self.recorder.start()
         yield
+        footprint = self.recorder.stop()
 
-        if self.outcome != SKIPPED:
-            self.executed.add(item.nodeid)
-        
-        if self.outcome == FAILED:
-            self.failed.add(item.nodeid)
+        if item.nodeid in self.executed:
+            self.footprints[item.nodeid] = footprint
 
-    @pytest.hookimpl(hookwrapper=True)
-    def pytest_runtest_makereport(self, item, call):
-        result = yield
-        report = result.get_result()
+    def pytest_runtest_logreport(self, report):
+        if report.when not in WHEN:
+            self.running.pop(report.nodeid, None)
+            self.executed.add(report.nodeid)
+            self.failed.add(report.nodeid)
+            return
+
+        outcome, duration = self.running.setdefault(
+            report.nodeid, [PASSED, [0.0, 0.0, 0.0]]
+        )
+
+        duration[WHEN.index(report.when)] = report.duration
 
         if report.skipped:
-            self.outcome = SKIPPED
+            outcome = SKIPPED
         elif report.failed:
-            self.outcome = FAILED
+            outcome = FAILED
+
+        self.running[report.nodeid][0] = outcome
+
+        if report.when != "teardown":
+            return
+
+        del self.running[report.nodeid]
+
+        if outcome != SKIPPED:
+            self.executed.add(report.nodeid)
+
+            if self.recorder is None:
+                self.durations[report.nodeid] = duration
+
+        if outcome == FAILED:
+            self.failed.add(report.nodeid)
+
+    def save_to_workeroutput(self, workeroutput):
+        workeroutput["cannier_footprints"] = {
+            nodeid: (sorted(writes), sorted(reads))
+            for nodeid, (writes, reads) in self.footprints.items()
+        }
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        footprints = getattr(node, "workeroutput", {}).get(
+            "cannier_footprints", {}
+        )
+
+        for nodeid, (writes, reads) in footprints.items():
+            self.footprints[nodeid] = set(writes), set(reads)
 
     def save_to_db(self, cur):
         cur.execute(
@@ -52,26 +117,86 @@ class RerunPlugin(BasePlugin):
             "where id = 1"
         )
 
-        executed = [(nodeid,) for nodeid in self.executed]
+        nodeid_to_id = stage_items(
+            cur, self.executed | self.durations.keys() | self.footprints.keys()
+        )
+
+        cur.execute(
+            "create temp table if not exists outcome ("
+            "nodeid text primary key, "
+            "failed integer not null)"
+        )
+
+        cur.execute("delete from temp.outcome")
 
         cur.executemany(
-            "insert or ignore into item "
-            "values (null, ?, 0, 0, 0, 0, 0, 0)", 
-            executed
+            "insert into temp.outcome "
+            "values (?, ?)",
+            [(nodeid, nodeid in self.failed) for nodeid in self.executed]
         )
 
-        cur.executemany(
+        cur.execute(
             "update item "
             f"set n_runs_{self.mode} = n_runs_{self.mode} + 1 "
-            "where nodeid = ?", 
-            executed
+            "where id in ("
+            "select item_id from temp.stage join temp.outcome using (nodeid))"
         )
 
-        failed = [(nodeid,) for nodeid in self.failed]
-        
-        cur.executemany(
+        cur.execute(
             "update item "
             f"set n_fail_{self.mode} = n_fail_{self.mode} + 1 "
-            "where nodeid = ?", 
-            failed
+            "where id in ("
+            "select item_id from temp.stage join temp.outcome using (nodeid) "
+            "where failed)"
+        )
+
+        create_run_table(cur)
+
+        cur.execute(
+            "insert into run "
+            "values (null, ?, ?, ?)",
+            (
+                self.mode,
+                encode_bitmap([nodeid_to_id[n] for n in self.executed]),
+                encode_bitmap([nodeid_to_id[n] for n in self.failed])
+            )
+        )
+
+        create_duration_table(cur)
+
+        cur.executemany(
+            "insert into duration "
+            "values (?, 1, ?, ?, ?, ?, ?, ?) "
+            "on conflict (item_id) do update "
+            "set n_samples = n_samples + 1, "
+            "mean_setup = mean_setup + "
+            "(excluded.mean_setup - mean_setup) / (n_samples + 1), "
+            "max_setup = max(max_setup, excluded.max_setup), "
+            "mean_call = mean_call + "
+            "(excluded.mean_call - mean_call) / (n_samples + 1), "
+            "max_call = max(max_call, excluded.max_call), "
+            "mean_teardown = mean_teardown + "
+            "(excluded.mean_teardown - mean_teardown) / (n_samples + 1), "
+            "max_teardown = max(max_teardown, excluded.max_teardown)",
+            [
+                (
+                    nodeid_to_id[nodeid], setup, setup, call, call, 
+                    teardown, teardown
+                )
+                for nodeid, (setup, call, teardown) in self.durations.items()
+            ]
+        )
+
+        create_footprint_table(cur)
+
+        cur.executemany(
+            "insert or replace into footprint "
+            "values (?, ?, ?)",
+            [
+                (
+                    nodeid_to_id[nodeid], encode_tokens(writes), 
+                    encode_tokens(reads)
+                )
+                for nodeid, (writes, reads) in self.footprints.items()
+            ]
         )
\ No newline at end of file
@@ -0,0 +1,28 @@
+import mmap
+import struct
+
+
+class ResultTable:
+    def __init__(self, n_rows, fmt):
+        self.row = struct.Struct("=B" + fmt)
+        self.n_rows = n_rows
+        self.buf = mmap.mmap(-1, max(n_rows, 1) * self.row.size)
+
+    def write(self, i, values):
+        offset = i * self.row.size
+        self.row.pack_into(self.buf, offset, 0, *values)
+        self.buf[offset] = 1
+
+    def read(self, i):
+        ready, *values = self.row.unpack_from(self.buf, i * self.row.size)
+        return values if ready else None
+
+    def clear(self, i):
+        self.buf[i * self.row.size] = 0
+
+    def __iter__(self):
+        for i in range(self.n_rows):
+            yield self.read(i)
+
+    def close(self):
+        self.buf.close()
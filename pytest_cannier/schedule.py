@@ -0,0 +1,35 @@
+import heapq
+
+
+def create_duration_table(cur):
+    cur.execute(
+        "create table if not exists duration ("
+        "item_id integer primary key, "
+        "n_samples integer not null, "
+        "mean_setup real not null, max_setup real not null, "
+        "mean_call real not null, max_call real not null, "
+        "mean_teardown real not null, max_teardown real not null)"
+    )
+
+
+def load_durations(cur):
+    create_duration_table(cur)
+
+    cur.execute(
+        "select nodeid, mean_setup + mean_call + mean_teardown "
+        "from duration join item on item.id = duration.item_id"
+    )
+
+    return dict(cur.fetchall())
+
+
+def pack_lpt(durations, n_bins):
+    bins = [[] for _ in range(n_bins)]
+    heap = [(0.0, i) for i in range(n_bins)]
+
+    for nodeid in sorted(durations, key=lambda k: (-durations[k], k)):
+        total, i = heapq.heappop(heap)
+        bins[i].append(nodeid)
+        heapq.heappush(heap, (total + durations[nodeid], i))
+
+    return bins
@@ -0,0 +1,107 @@
+import time
+import zlib
+
+from array import array
+
+
+N_COLUMNS = 3
+BYTES = 2
+
+
+def create_series_table(cur):
+    cur.execute(
+        "create table if not exists series ("
+        "item_id integer not null, "
+        "interval real not null, "
+        "n_samples integer not null, "
+        "samples blob not null, "
+        "slope real not null, "
+        "time_to_peak real not null)"
+    )
+
+
+def encode_series(columns):
+    return zlib.compress(b"".join(column.tobytes() for column in columns))
+
+
+def decode_series(blob, n_samples):
+    data = array("q", zlib.decompress(blob))
+
+    return [
+        data[i * n_samples:(i + 1) * n_samples] for i in range(N_COLUMNS)
+    ]
+
+
+def get_slope(values, interval):
+    n = len(values)
+
+    if n < 2 or interval <= 0:
+        return 0.0
+
+    x_mean = (n - 1) / 2
+    y_mean = sum(values) / n
+
+    cov = sum((i - x_mean) * (y - y_mean) for i, y in enumerate(values))
+    var = sum((i - x_mean) ** 2 for i in range(n))
+    return cov / var / interval
+
+
+def get_time_to_peak(values, interval):
+    if not values:
+        return 0.0
+
+    return values.index(max(values)) * interval
+
+
+class Series:
+    def __init__(self, size):
+        self.size = max(size + size % 2, 2)
+        self.columns = [array("q", [0]) * self.size for _ in range(N_COLUMNS)]
+        self.n = 0
+        self.n_raw = 0
+        self.stride = 1
+        self.start = self.end = None
+
+    def downsample(self):
+        for column in self.columns:
+            for i in range(0, self.n, 2):
+                column[i // 2] = max(column[i], column[i + 1])
+
+        self.n //= 2
+        self.stride *= 2
+
+    def append(self, values):
+        self.end = time.monotonic()
+
+        if self.start is None:
+            self.start = self.end
+
+        if self.n_raw % self.stride == 0:
+            if self.n == self.size:
+                self.downsample()
+
+            for column, value in zip(self.columns, values):
+                column[self.n] = value
+
+            self.n += 1
+        else:
+            for column, value in zip(self.columns, values):
+                column[self.n - 1] = max(column[self.n - 1], value)
+
+        self.n_raw += 1
+
+    def get_interval(self):
+        if self.n_raw < 2:
+            return 0.0
+
+        return (self.end - self.start) / (self.n_raw - 1) * self.stride
+
+    def encode(self):
+        columns = [column[:self.n] for column in self.columns]
+        interval = self.get_interval()
+        values = columns[BYTES].tolist()
+
+        return (
+            interval, self.n, encode_series(columns),
+            get_slope(values, interval), get_time_to_peak(values, interval)
+        )
@@ -0,0 +1,232 @@
+import os
+import time
+import errno
+import select
+import pytest
+import signal
+
+from psutil import NoSuchProcess, Process
+
+
+TIMED_OUT = "timeout"
+
+
+def get_exitcode(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+
+    return os.WEXITSTATUS(status)
+
+
+def check_child(exitcode, result):
+    if exitcode or result is None:
+        pytest.exit(
+            "pytest-cannier: child process error.", 
+            pytest.ExitCode.INTERNAL_ERROR
+        )
+
+
+def kill_tree(pid):
+    try:
+        proc = Process(pid)
+        procs = [proc, *proc.children(recursive=True)]
+    except NoSuchProcess:
+        return
+
+    for proc in procs:
+        try:
+            proc.kill()
+        except NoSuchProcess:
+            pass
+
+
+def open_pidfd(pid):
+    if not hasattr(os, "pidfd_open"):
+        return None
+
+    try:
+        return os.pidfd_open(pid)
+    except OSError as e:
+        if e.errno in {errno.ENOSYS, errno.EPERM}:
+            return None
+
+        raise
+
+
+class Child:
+    def __init__(self, pid, pipe, pidfd, timeout, started):
+        self.pid = pid
+        self.pipe = pipe
+        self.pidfd = pidfd
+        self.timeout = timeout
+        self.started = started
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.killed = False
+        self.result = None
+        self.exitcode = None
+
+
+class Supervisor:
+    def __init__(self):
+        self.epoll = select.epoll()
+        self.children = {}
+        self.fds = {}
+        self.wakeup = None
+
+    def start_wakeup(self):
+        wakeup_r, wakeup_w = os.pipe()
+        os.set_blocking(wakeup_r, False)
+        os.set_blocking(wakeup_w, False)
+        self.handler = signal.signal(signal.SIGCHLD, lambda *args: None)
+        self.wakeup_fd = signal.set_wakeup_fd(wakeup_w)
+        self.wakeup = wakeup_r, wakeup_w
+        self.epoll.register(wakeup_r, select.EPOLLIN)
+
+    def add(self, pid, pipe=None, timeout=None, started=None):
+        pidfd = open_pidfd(pid)
+        child = Child(pid, pipe, pidfd, timeout, started)
+        self.children[pid] = child
+
+        if pidfd is not None:
+            self.fds[pidfd] = child
+            self.epoll.register(pidfd, select.EPOLLIN)
+        elif self.wakeup is None:
+            self.start_wakeup()
+
+        if pipe is not None:
+            self.fds[pipe.fileno()] = child
+            self.epoll.register(pipe.fileno(), select.EPOLLIN)
+
+    def remove_fd(self, fd):
+        self.epoll.unregister(fd)
+        del self.fds[fd]
+
+    def read_pipe(self, child):
+        try:
+            child.result = child.pipe.recv()
+        except EOFError:
+            pass
+
+        self.remove_fd(child.pipe.fileno())
+        child.pipe.close()
+        child.pipe = None
+
+    def reap(self, child, flags=0):
+        pid, status = os.waitpid(child.pid, flags)
+
+        if pid == 0:
+            return
+
+        child.exitcode = get_exitcode(status)
+
+        if child.pidfd is not None:
+            self.remove_fd(child.pidfd)
+            os.close(child.pidfd)
+            child.pidfd = None
+
+    def reap_nohang(self):
+        try:
+            while os.read(self.wakeup[0], 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+        for child in list(self.children.values()):
+            if child.pidfd is None and child.exitcode is None:
+                self.reap(child, os.WNOHANG)
+
+    def kill_expired(self):
+        now = time.monotonic()
+        deadlines = []
+
+        for child in self.children.values():
+            if child.deadline is None or child.killed:
+                continue
+
+            if child.exitcode is not None:
+                continue
+
+            if child.started is not None:
+                start = child.started()
+
+                if start is not None:
+                    child.deadline = max(child.deadline, start + child.timeout)
+
+            if now >= child.deadline:
+                kill_tree(child.pid)
+                child.killed = True
+            else:
+                deadlines.append(child.deadline)
+
+        return min(deadlines, default=None)
+
+    def pop_finished(self):
+        finished = []
+
+        for child in list(self.children.values()):
+            if child.exitcode is None:
+                continue
+
+            if child.pipe is not None:
+                if child.pipe.poll():
+                    self.read_pipe(child)
+                else:
+                    self.remove_fd(child.pipe.fileno())
+                    child.pipe.close()
+                    child.pipe = None
+
+            del self.children[child.pid]
+            exitcode = TIMED_OUT if child.killed else child.exitcode
+            finished.append((child.pid, exitcode, child.result))
+
+        return finished
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            if self.wakeup is not None:
+                self.reap_nohang()
+
+            finished = self.pop_finished()
+
+            if finished or not self.children:
+                return finished
+
+            child_deadline = self.kill_expired()
+
+            if deadline is not None and time.monotonic() >= deadline:
+                return []
+
+            deadlines = [
+                d for d in (deadline, child_deadline) if d is not None
+            ]
+
+            if deadlines:
+                remaining = max(min(deadlines) - time.monotonic(), 0)
+            else:
+                remaining = -1
+
+            for fd, _ in self.epoll.poll(remaining):
+                child = self.fds.get(fd)
+
+                if child is None:
+                    continue
+
+                if child.pipe is not None and fd == child.pipe.fileno():
+                    self.read_pipe(child)
+                elif fd == child.pidfd:
+                    self.reap(child)
+
+    def close(self):
+        for child in self.children.values():
+            if child.pidfd is not None:
+                os.close(child.pidfd)
+
+        if self.wakeup is not None:
+            signal.set_wakeup_fd(self.wakeup_fd)
+            signal.signal(signal.SIGCHLD, self.handler)
+            os.close(self.wakeup[0])
+            os.close(self.wakeup[1])
+
+        self.epoll.close()
@@ -1,41 +1,174 @@
-import gc
 import os
+import time
+import hashlib
 import pytest
 import random
-import sqlite3
 
-from psutil import Process
-from multiprocessing import Pipe
+from pytest_cannier.db import run_transaction
+from pytest_cannier.base import BasePlugin, save_timeouts, stage_items
+from pytest_cannier.churn import get_revision
+from pytest_cannier.fork import PageCounter, prepare_fork
+from pytest_cannier.results import ResultTable
+from pytest_cannier.bitmap import get_co_failures_with
+from pytest_cannier.supervisor import TIMED_OUT, Supervisor, check_child
+from pytest_cannier.footprint import load_footprints, footprints_overlap
 
-from pytest_cannier.base import BasePlugin
 
+PASSED, FAILED, SKIPPED, TIMEOUT = 0, 1, 2, 3
 
-PASSED, FAILED, SKIPPED = 0, 1, 2
+
+def create_probe_table(cur):
+    cur.execute(
+        "create table if not exists probe ("
+        "victim_nodeid text not null, "
+        "revision text not null, "
+        "candidates text not null, "
+        "outcome integer not null, "
+        "primary key (victim_nodeid, revision, candidates))"
+    )
+
+
+def load_candidate_ranks(cur, victim_nodeid):
+    cur.execute(
+        "select id, nodeid "
+        "from item"
+    )
+
+    id_to_nodeid = dict(cur.fetchall())
+
+    victim_id = next(
+        (i for i, nodeid in id_to_nodeid.items() if nodeid == victim_nodeid), 
+        None
+    )
+
+    co_failures = get_co_failures_with(cur, victim_id, "shuffle")
+
+    cur.execute(
+        "select item_id, avg(n_ext_mods) "
+        "from features "
+        "group by item_id"
+    )
+
+    n_ext_mods = dict(cur.fetchall())
+
+    victim_file = victim_nodeid.split("::")[0] if victim_nodeid else None
+    victim_dir = os.path.dirname(victim_file) if victim_file else None
+    ranks = {}
+
+    for item_id, nodeid in id_to_nodeid.items():
+        file_name = nodeid.split("::")[0]
+
+        ranks[nodeid] = (
+            co_failures.get(item_id, 0), file_name == victim_file,
+            os.path.dirname(file_name) == victim_dir,
+            n_ext_mods.get(item_id) or 0
+        )
+
+    return ranks
+
+
+def get_probe_key(group):
+    nodeids = "\n".join(it.nodeid for it in group)
+    return hashlib.sha1(nodeids.encode()).hexdigest()
+
+
+def get_outcome(exitcode, result):
+    if exitcode == TIMED_OUT:
+        return None if result is None else TIMEOUT
+
+    check_child(exitcode, result)
+    return result[0]
+
+
+def get_shared_depth(item, other):
+    depth = 0
+
+    for node, other_node in zip(item.listchain(), other.listchain()):
+        if node is not other_node:
+            break
+
+        depth += 1
+
+    return depth
+
+
+def load_candidate_polluters(cur):
+    cur.execute(
+        "select count_features, count_baseline, count_shuffle "
+        "from counters "
+        "where id = 1"
+    )
+
+    cur.execute(
+        "select nodeid "
+        "from item "
+        "where n_runs_features >= ? and "
+        "n_runs_baseline = ? and "
+        "n_runs_shuffle = ?",
+        cur.fetchone()
+    )
+
+    return set(nodeid for nodeid, in cur.fetchall())
 
 
 class VictimPlugin(BasePlugin):
-    def __init__(self, db_file, victim_nodeid):
+    def __init__(
+        self, db_file, victim_nodeid, search="bisect", n_workers=1, 
+        footprint=False, max_polluters=None, budget=None, timeout=None,
+        fork_stats=False
+    ):
         super().__init__(db_file)
         self.polluters = set()
         self.victim_nodeid = victim_nodeid
+        self.search = search
+        self.n_workers = n_workers
+        self.footprint = footprint
+        self.max_polluters = max_polluters
+        self.budget = budget
+        self.timeout = timeout
+        self.fork_stats = fork_stats
+        self.deadline = None
+        self.timeouts = {}
+        self.revision = None
+        self.ranks = {}
+
+    def pytest_sessionstart(self, session):
+        self.revision = get_revision()
+        super().pytest_sessionstart(session)
 
     def load_from_db(self, cur):
-        cur.execute(
-            "select count_features, count_baseline, count_shuffle "
-            "from counters "
-            "where id = 1"
-        )
+        self.candidate_polluters = load_candidate_polluters(cur)
+        self.probes = {}
 
-        cur.execute(
-            "select nodeid "
-            "from item "
-            "where n_runs_features = ? and "
-            "n_runs_baseline = ? and "
-            "n_runs_shuffle = ?",
-            cur.fetchone()
-        )
+        if self.revision is not None:
+            create_probe_table(cur)
+
+            cur.execute(
+                "select candidates, outcome "
+                "from probe "
+                "where victim_nodeid = ? and revision = ?",
+                (self.victim_nodeid, self.revision)
+            )
+
+            self.probes = dict(cur.fetchall())
 
-        self.candidate_polluters = set(nodeid for nodeid, in cur.fetchall())
+        self.ranks = load_candidate_ranks(cur, self.victim_nodeid)
+
+        if not self.footprint:
+            return
+
+        footprints = load_footprints(cur)
+
+        if self.victim_nodeid not in footprints:
+            return
+
+        _, reads = footprints[self.victim_nodeid]
+
+        self.candidate_polluters = set(
+            nodeid for nodeid in self.candidate_polluters
+            if nodeid not in footprints or 
+            footprints_overlap(footprints[nodeid][0], reads)
+        )
 
     def get_victim(self, items):
         for it in items:
@@ -47,58 +180,173 @@ class VictimPlugin(BasePlugin):
             pytest.ExitCode.INTERNAL_ERROR
         )
 
-    @pytest.hookimpl(trylast=True)
-    def pytest_collection_modifyitems(self, session, config, items):
-        victim = self.get_victim(items)
-        pipe_parent, self.pipe_child = Pipe()
-        gc.disable()
+    def fork_probe(self, items, group, victim, slot):
+        self.results.clear(slot)
+        self.starts.clear(slot)
         pid = os.fork()
 
         if pid == 0:
-            items[:] = [victim]
+            self.slot = slot
+            items[:] = [*group, victim]
+            return None
+
+        self.supervisor.add(
+            pid, timeout=self.timeout, started=lambda: self.get_start(slot)
+        )
+
+        return pid
+
+    def get_start(self, slot):
+        result = self.starts.read(slot)
+        return None if result is None else result[0]
+
+    def collect_pages(self, slot):
+        if self.pages is not None:
+            self.pages.collect(slot)
+
+    def save_probe(self, group, outcome):
+        if self.revision is None or outcome is None:
             return
 
-        if Process(pid).wait():
-            pytest.exit(
-                "pytest-cannier: child process error.", 
-                pytest.ExitCode.INTERNAL_ERROR
+        run_transaction(
+            self.db_file, lambda cur: cur.execute(
+                "insert or replace into probe "
+                "values (?, ?, ?, ?)",
+                (
+                    self.victim_nodeid, self.revision, get_probe_key(group), 
+                    outcome
+                )
             )
+        )
 
-        expected_outcome = pipe_parent.recv()
+    def is_finished(self):
+        if self.max_polluters and len(self.polluters) >= self.max_polluters:
+            return True
 
-        for polluter in items:
-            if polluter.nodeid not in self.candidate_polluters:
-                continue
+        return self.deadline is not None and time.monotonic() >= self.deadline
 
-            pid = os.fork()
+    def get_rank(self, it):
+        return self.ranks.get(it.nodeid, (0, False, False, 0))
 
-            if pid == 0:
-                items[:] = [polluter, victim]
+    def update_groups(self, groups, group, expected_outcome, outcome):
+        if outcome is None and len(group) == 1:
+            nodeid = group[0].nodeid
+            self.timeouts[nodeid] = self.timeouts.get(nodeid, 0) + 1
+            return
+
+        if expected_outcome == outcome:
+            return
+
+        if len(group) == 1:
+            self.polluters.add(group[0].nodeid)
+        else:
+            mid = len(group) // 2
+            halves = [group[mid:], group[:mid]]
+            halves.sort(key=lambda half: max(map(self.get_rank, half)))
+            groups += halves
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, session, config, items):
+        victim = self.get_victim(items)
+
+        if self.budget:
+            self.deadline = time.monotonic() + self.budget
+
+        self.supervisor = Supervisor()
+        self.results = ResultTable(self.n_workers, "B")
+        self.starts = ResultTable(self.n_workers, "d")
+
+        if self.fork_stats:
+            self.pages = PageCounter(self.n_workers)
+
+        prepare_fork(items)
+        expected_outcome = self.probes.get(get_probe_key([]))
+
+        if expected_outcome is None:
+            if self.fork_probe(items, [], victim, 0) is None:
                 return
 
-            if Process(pid).wait():
-                pytest.exit(
-                    "pytest-cannier: child process error.", 
-                    pytest.ExitCode.INTERNAL_ERROR
-                )
+            (_, exitcode, _), = self.supervisor.wait()
+            expected_outcome = get_outcome(exitcode, self.results.read(0))
+
+            if expected_outcome is None:
+                expected_outcome = TIMEOUT
+
+            self.collect_pages(0)
+            self.save_probe([], expected_outcome)
+
+        candidates = [
+            it for it in items if it.nodeid in self.candidate_polluters and 
+            it.nodeid != self.victim_nodeid
+        ]
+
+        candidates.sort(key=lambda it: it.nodeid)
+
+        if self.search == "linear":
+            candidates.sort(key=self.get_rank, reverse=True)
+            groups = [[it] for it in reversed(candidates)]
+        else:
+            groups = [candidates] if candidates else []
+
+        running = {}
+        slots = list(range(self.n_workers))
+
+        while groups or running:
+            if self.is_finished():
+                groups.clear()
+
+            while groups and len(running) < self.n_workers:
+                group = groups.pop()
+                outcome = self.probes.get(get_probe_key(group))
+
+                if outcome is not None:
+                    self.update_groups(
+                        groups, group, expected_outcome, outcome
+                    )
+
+                    continue
+
+                slot = slots.pop()
+                pid = self.fork_probe(items, group, victim, slot)
 
-            outcome = pipe_parent.recv()
-            
-            if expected_outcome != outcome:
-                self.polluters.add(polluter.nodeid)
+                if pid is None:
+                    return
+
+                running[pid] = group, slot
+
+            for pid, exitcode, _ in self.supervisor.wait():
+                group, slot = running.pop(pid)
+                outcome = get_outcome(exitcode, self.results.read(slot))
+                self.collect_pages(slot)
+                slots.append(slot)
+                self.save_probe(group, outcome)
+                self.update_groups(groups, group, expected_outcome, outcome)
+
+        self.supervisor.close()
+        self.results.close()
+        self.starts.close()
+
+        if self.pages is not None:
+            self.pages.close()
 
         pytest.exit("pytest-cannier: finished.", pytest.ExitCode.OK)
 
     @pytest.hookimpl(hookwrapper=True)
     def pytest_runtest_protocol(self, item, nextitem):
+        self.starts.write(self.slot, [time.monotonic()])
+
         if item.nodeid != self.victim_nodeid:
             yield
             return
 
         self.outcome = PASSED
+        self.results.write(self.slot, [TIMEOUT])
         yield
 
-        self.pipe_child.send(self.outcome)
+        if self.pages is not None:
+            self.pages.record(self.slot)
+
+        self.results.write(self.slot, [self.outcome])
         os._exit(0)
 
     @pytest.hookimpl(hookwrapper=True)
@@ -116,15 +364,7 @@ class VictimPlugin(BasePlugin):
             self.outcome = FAILED
 
     def save_to_db(self, cur):
-        cur.execute(
-            "select id, nodeid "
-            "from item"
-        )
-
-        nodeid_to_id = {
-            nodeid: item_id for item_id, nodeid in cur.fetchall()
-        }
-
+        nodeid_to_id = stage_items(cur, [self.victim_nodeid, *self.polluters])
         victim_id = nodeid_to_id[self.victim_nodeid]
 
         cur.execute(
@@ -141,4 +381,238 @@ class VictimPlugin(BasePlugin):
                 (victim_id, nodeid_to_id[polluter_nodeid]) 
                 for polluter_nodeid in self.polluters
             ]
-        )
\ No newline at end of file
+        )
+
+        save_timeouts(cur, "victim", self.timeouts)
+
+
+class MultiVictimPlugin(BasePlugin):
+    def __init__(
+        self, db_file, victim_nodeids, n_workers=1, footprint=False, 
+        timeout=None, fork_stats=False
+    ):
+        super().__init__(db_file)
+        self.polluters = {}
+        self.timeouts = {}
+        self.timeout = timeout
+        self.fork_stats = fork_stats
+        self.victim_nodeids = victim_nodeids
+        self.n_workers = n_workers
+        self.footprint = footprint
+        self.footprints = {}
+
+    def load_from_db(self, cur):
+        self.candidate_polluters = load_candidate_polluters(cur)
+
+        if self.footprint:
+            self.footprints = load_footprints(cur)
+
+        if self.victim_nodeids:
+            return
+
+        cur.execute(
+            "select nodeid "
+            "from item "
+            "where n_fail_shuffle > 0 and n_fail_baseline = 0"
+        )
+
+        self.victim_nodeids = [nodeid for nodeid, in cur.fetchall()]
+
+    def may_pollute(self, polluter_nodeid, victim_nodeid):
+        if polluter_nodeid == victim_nodeid:
+            return False
+
+        if polluter_nodeid not in self.footprints:
+            return True
+
+        if victim_nodeid not in self.footprints:
+            return True
+
+        writes, _ = self.footprints[polluter_nodeid]
+        _, reads = self.footprints[victim_nodeid]
+        return footprints_overlap(writes, reads)
+
+    def run_victims(self, victims):
+        supervisor = Supervisor()
+        results = ResultTable(len(victims), "B")
+        outcomes = []
+
+        for i, victim in enumerate(victims):
+            pid = os.fork()
+
+            if pid == 0:
+                self.outcome = PASSED
+                results.write(i, [TIMEOUT])
+
+                try:
+                    victim.session._setupstate.teardown_exact(victim)
+
+                    victim.ihook.pytest_runtest_protocol(
+                        item=victim, nextitem=None
+                    )
+                finally:
+                    results.write(i, [self.outcome])
+                    os._exit(0)
+
+            supervisor.add(pid, timeout=self.timeout)
+            (_, exitcode, _), = supervisor.wait()
+            outcomes.append(get_outcome(exitcode, results.read(i)))
+
+        supervisor.close()
+        results.close()
+        return outcomes
+
+    def fork_polluter(self, polluter, victims, slot):
+        self.results.clear(slot)
+        pid = os.fork()
+
+        if pid == 0:
+            status = 1
+
+            try:
+                nextitem = max(
+                    victims, key=lambda victim: get_shared_depth(
+                        polluter, victim
+                    )
+                )
+
+                polluter.ihook.pytest_runtest_protocol(
+                    item=polluter, nextitem=nextitem
+                )
+
+                outcomes = self.run_victims(victims)
+                outcomes += [PASSED] * (self.n_victims - len(outcomes))
+
+                if self.pages is not None:
+                    self.pages.record(slot)
+
+                self.results.write(slot, outcomes)
+                status = 0
+            finally:
+                os._exit(status)
+
+        timeout = self.timeout
+
+        if timeout is not None:
+            timeout *= len(victims) + 1
+
+        self.supervisor.add(pid, timeout=timeout)
+        return pid
+
+    def pytest_runtestloop(self, session):
+        victim_nodeids = set(self.victim_nodeids)
+        victims = [it for it in session.items if it.nodeid in victim_nodeids]
+
+        if not victims:
+            pytest.exit(
+                "pytest-cannier: could not find victim test cases.", 
+                pytest.ExitCode.INTERNAL_ERROR
+            )
+
+        self.supervisor = Supervisor()
+        self.n_victims = len(victims)
+        self.results = ResultTable(self.n_workers, f"{self.n_victims}B")
+
+        if self.fork_stats:
+            self.pages = PageCounter(self.n_workers)
+
+        prepare_fork(session.items)
+        expected_outcomes = self.run_victims(victims)
+        self.polluters = {victim.nodeid: set() for victim in victims}
+
+        for victim, expected_outcome in zip(victims, expected_outcomes):
+            if expected_outcome == TIMEOUT:
+                self.timeouts[victim.nodeid] = 1
+
+        polluters = [
+            it for it in reversed(session.items) 
+            if it.nodeid in self.candidate_polluters
+        ]
+
+        running = {}
+        slots = list(range(self.n_workers))
+
+        while polluters or running:
+            while polluters and len(running) < self.n_workers:
+                polluter = polluters.pop()
+
+                victims_polluter = [
+                    (victim, expected_outcome) 
+                    for victim, expected_outcome in zip(
+                        victims, expected_outcomes
+                    ) 
+                    if self.may_pollute(polluter.nodeid, victim.nodeid)
+                ]
+
+                if not victims_polluter:
+                    continue
+
+                slot = slots.pop()
+
+                pid = self.fork_polluter(
+                    polluter, [victim for victim, _ in victims_polluter], slot
+                )
+
+                running[pid] = polluter, victims_polluter, slot
+
+            for pid, exitcode, _ in self.supervisor.wait():
+                polluter, victims_polluter, slot = running.pop(pid)
+                slots.append(slot)
+
+                if self.pages is not None:
+                    self.pages.collect(slot)
+
+                if exitcode == TIMED_OUT:
+                    self.timeouts[polluter.nodeid] = 1
+                    continue
+
+                outcomes = self.results.read(slot)
+                check_child(exitcode, outcomes)
+
+                for (victim, expected_outcome), outcome in zip(
+                    victims_polluter, outcomes
+                ):
+                    if expected_outcome != outcome:
+                        self.polluters[victim.nodeid].add(polluter.nodeid)
+
+        self.supervisor.close()
+        self.results.close()
+
+        if self.pages is not None:
+            self.pages.close()
+
+        return True
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        result = yield
+        report = result.get_result()
+
+        if report.skipped:
+            self.outcome = SKIPPED
+        elif report.failed:
+            self.outcome = FAILED
+
+    def save_to_db(self, cur):
+        nodeid_to_id = stage_items(
+            cur, self.polluters.keys() | set().union(*self.polluters.values())
+        )
+
+        cur.executemany(
+            "update item "
+            "set n_runs_victim = n_runs_victim + 1 "
+            "where id = ?", 
+            [(nodeid_to_id[nodeid],) for nodeid in self.polluters]
+        )
+
+        cur.executemany(
+            "insert or ignore into dependency "
+            "values (?, ?)", 
+            [
+                (nodeid_to_id[victim_nodeid], nodeid_to_id[polluter_nodeid]) 
+                for victim_nodeid, polluters in self.polluters.items()
+                for polluter_nodeid in polluters
+            ]
+        )
+
+        save_timeouts(cur, "victims", self.timeouts)
@@ -0,0 +1,28 @@
+import sqlite3
+
+from pytest_cannier.base import stage_items
+
+
+def test_stage_items(db_file):
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+        foo_id = stage_items(cur, ["test_foo"])["test_foo"]
+        nodeid_to_id = stage_items(cur, ["test_bar", "test_foo", "test_bar"])
+        assert nodeid_to_id.keys() == {"test_foo", "test_bar"}
+        assert nodeid_to_id["test_foo"] == foo_id
+
+        cur.execute(
+            "select id, nodeid "
+            "from item"
+        )
+
+        assert {nodeid: item_id for item_id, nodeid in cur.fetchall()} == (
+            nodeid_to_id
+        )
+
+        cur.execute(
+            "select count(*) "
+            "from temp.stage"
+        )
+
+        assert cur.fetchone()[0] == 2
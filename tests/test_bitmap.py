@@ -0,0 +1,74 @@
+import sqlite3
+
+from pytest_cannier.rerun import RerunPlugin
+from pytest_cannier.bitmap import (
+    encode_bitmap, decode_bitmap, get_co_failures, get_co_failures_with
+)
+
+
+def test_encode_decode_bitmap():
+    assert decode_bitmap(encode_bitmap([])) == []
+    assert decode_bitmap(encode_bitmap([0, 7, 8, 1000])) == [0, 7, 8, 1000]
+    assert decode_bitmap(encode_bitmap({3, 1, 2})) == [1, 2, 3]
+
+
+def test_get_co_failures(db_file):
+    plugin = RerunPlugin(db_file, "baseline")
+    plugin.executed = {"test_foo"}
+    plugin.failed = set()
+
+    with sqlite3.connect(db_file) as con:
+        plugin.save_to_db(con.cursor())
+
+    plugin.executed = {"test_bar"}
+
+    with sqlite3.connect(db_file) as con:
+        plugin.save_to_db(con.cursor())
+
+    plugin.executed = {"test_foo", "test_bar", "test_baz"}
+
+    for mode, failed in [
+        ("baseline", {"test_foo", "test_bar"}),
+        ("shuffle", {"test_foo", "test_bar", "test_baz"}),
+        ("shuffle", {"test_bar", "test_baz"}),
+        ("shuffle", set()),
+    ]:
+        plugin.mode = mode
+        plugin.failed = failed
+
+        with sqlite3.connect(db_file) as con:
+            plugin.save_to_db(con.cursor())
+
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+
+        cur.execute(
+            "select nodeid, id "
+            "from item"
+        )
+
+        nodeid_to_id = dict(cur.fetchall())
+        foo = nodeid_to_id["test_foo"]
+        bar = nodeid_to_id["test_bar"]
+        baz = nodeid_to_id["test_baz"]
+
+        cur.execute(
+            "select executed "
+            "from run "
+            "where id > 2"
+        )
+
+        for executed, in cur.fetchall():
+            assert decode_bitmap(executed) == [foo, bar, baz]
+
+        assert get_co_failures(cur) == {
+            (foo, bar): 2, (foo, baz): 1, (bar, baz): 2
+        }
+
+        assert get_co_failures(cur, "shuffle") == {
+            (foo, bar): 1, (foo, baz): 1, (bar, baz): 2
+        }
+
+        assert get_co_failures_with(cur, bar) == {foo: 2, baz: 2}
+        assert get_co_failures_with(cur, foo, "shuffle") == {bar: 1, baz: 1}
+        assert get_co_failures_with(cur, None, "shuffle") == {}
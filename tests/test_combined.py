@@ -0,0 +1,74 @@
+import pytest
+import sqlite3
+
+from types import SimpleNamespace
+
+from pytest_cannier.db import run_transaction
+from pytest_cannier.rerun import RerunPlugin
+from pytest_cannier.isolated import IsolatedPlugin
+from pytest_cannier.combined import CombinedPlugin
+from pytest_cannier.supervisor import Supervisor
+
+
+def test_save_to_db(db_file):
+    baseline = RerunPlugin(db_file, "baseline")
+    baseline.executed = {"test_foo", "test_bar"}
+    baseline.failed = {"test_bar"}
+    shuffle = RerunPlugin(db_file, "shuffle")
+    shuffle.executed = {"test_foo", "test_bar"}
+    shuffle.failed = {"test_foo"}
+    isolated = IsolatedPlugin(db_file, 2)
+    isolated.executed = {"test_foo": 2}
+    plugin = CombinedPlugin(db_file, [baseline, shuffle, isolated])
+    run_transaction(db_file, plugin.save_to_db)
+
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+
+        cur.execute(
+            "select count_baseline, count_shuffle, count_isolated "
+            "from counters"
+        )
+
+        assert cur.fetchone() == (1, 1, 1)
+
+        cur.execute(
+            "select nodeid, n_runs_baseline, n_fail_baseline, "
+            "n_runs_shuffle, n_fail_shuffle, n_runs_isolated "
+            "from item"
+        )
+
+        assert set(cur.fetchall()) == {
+            ("test_foo", 1, 0, 1, 1, 2),
+            ("test_bar", 1, 1, 1, 0, 0)
+        }
+
+
+@pytest.mark.parametrize(
+    "exc", [pytest.Session.Failed, pytest.Session.Interrupted]
+)
+def test_run_phase_stopped(exc):
+    class StoppedPlugin:
+        results = ("executed",)
+
+        def __init__(self):
+            self.executed = set()
+
+        def pytest_runtestloop(self, session):
+            self.executed.add("test_foo")
+            raise exc("stopping after 1 failures")
+
+    session = SimpleNamespace(
+        items=[], config=SimpleNamespace(
+            pluginmanager=SimpleNamespace(register=lambda plugin: None)
+        ),
+        Failed=pytest.Session.Failed, Interrupted=pytest.Session.Interrupted
+    )
+
+    plugin = CombinedPlugin(None, [])
+    plugin.items = []
+    plugin.supervisor = Supervisor()
+    stopped = StoppedPlugin()
+    plugin.run_phase(session, stopped)
+    plugin.supervisor.close()
+    assert stopped.executed == {"test_foo"}
@@ -0,0 +1,97 @@
+import pytest
+import sqlite3
+import threading
+
+from pytest_cannier import db
+from pytest_cannier.db import connect, run_transaction
+
+
+def insert_item(cur):
+    cur.execute(
+        "insert into item "
+        "(nodeid, n_runs_features, n_runs_baseline, n_fail_baseline, "
+        "n_runs_shuffle, n_fail_shuffle, n_runs_victim) "
+        "values ('test_foo', 0, 0, 0, 0, 0, 0)"
+    )
+
+
+def get_nodeids(db_file):
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+
+        cur.execute(
+            "select nodeid "
+            "from item"
+        )
+
+        return [nodeid for nodeid, in cur.fetchall()]
+
+
+def test_connect(db_file):
+    con = connect(db_file)
+    assert con.execute("pragma journal_mode").fetchone()[0] == "wal"
+    assert con.execute("pragma synchronous").fetchone()[0] == 1
+    con.close()
+
+
+def test_run_transaction(db_file):
+    def fail(cur):
+        insert_item(cur)
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        run_transaction(db_file, fail)
+
+    assert get_nodeids(db_file) == []
+    run_transaction(db_file, insert_item)
+    assert get_nodeids(db_file) == ["test_foo"]
+
+
+def test_run_transaction_locked(monkeypatch, db_file):
+    monkeypatch.setattr(db, "BUSY_TIMEOUT", 0)
+
+    con = sqlite3.connect(
+        db_file, isolation_level=None, check_same_thread=False
+    )
+
+    con.execute("begin immediate")
+    timer = threading.Timer(0.2, lambda: con.execute("commit"))
+    timer.start()
+
+    try:
+        run_transaction(db_file, insert_item)
+    finally:
+        timer.join()
+        con.close()
+
+    assert get_nodeids(db_file) == ["test_foo"]
+
+    monkeypatch.setattr(db, "MAX_RETRIES", 1)
+    con = connect(db_file)
+    con.execute("begin immediate")
+
+    with pytest.raises(sqlite3.OperationalError):
+        run_transaction(db_file, insert_item)
+
+    con.execute("rollback")
+    con.close()
+
+
+def test_run_transaction_deferred(monkeypatch, db_file):
+    monkeypatch.setattr(db, "BUSY_TIMEOUT", 0)
+    monkeypatch.setattr(db, "MAX_RETRIES", 1)
+    run_transaction(db_file, insert_item)
+    con = connect(db_file)
+    con.execute("begin immediate")
+
+    try:
+        assert run_transaction(
+            db_file, lambda cur: cur.execute(
+                "select nodeid "
+                "from item"
+            ).fetchall(),
+            immediate=False
+        ) == [("test_foo",)]
+    finally:
+        con.execute("rollback")
+        con.close()
@@ -0,0 +1,55 @@
+import math
+import sqlite3
+
+from pytest_cannier.export import export, open_column, main
+
+
+def insert_features(db_file, rows):
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+
+        cur.executemany(
+            "insert or ignore into item "
+            "(nodeid, n_runs_features, n_runs_baseline, n_fail_baseline, "
+            "n_runs_shuffle, n_fail_shuffle, n_runs_victim) "
+            "values (?, 1, 0, 0, 0, 0, 0)",
+            [(nodeid,) for nodeid, _ in rows]
+        )
+
+        cur.executemany(
+            "insert into features "
+            "select id, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ? "
+            "from item where nodeid = ?",
+            [(*features, nodeid) for nodeid, features in rows]
+        )
+
+
+def test_export(db_file, tmpdir):
+    export_dir = tmpdir.join("export").strpath
+    insert_features(db_file, [("test_foo", [1] * 18), ("test_bar", [2] * 18)])
+
+    with sqlite3.connect(db_file) as con:
+        con.execute(
+            "insert into dependency "
+            "values (2, 1)"
+        )
+
+    assert export(db_file, export_dir) == 2
+    assert list(open_column(f"{export_dir}/features/item_id.npy")) == [1, 2]
+    assert list(open_column(f"{export_dir}/features/mnt_idx.npy")) == [1, 2]
+    assert open_column(f"{export_dir}/item/nodeid.npy") == [
+        "test_foo", "test_bar"
+    ]
+
+    assert list(open_column(f"{export_dir}/item/n_polluters.npy")) == [0, 1]
+    assert list(open_column(f"{export_dir}/item/n_victims.npy")) == [1, 0]
+    insert_features(db_file, [("test_foo", [3] * 17 + [None])])
+    assert export(db_file, export_dir) == 1
+    item_ids = open_column(f"{export_dir}/features/item_id.npy")
+    mnt_idx = open_column(f"{export_dir}/features/mnt_idx.npy")
+    assert list(item_ids) == [1, 2, 1]
+    assert list(mnt_idx[:2]) == [1, 2] and math.isnan(mnt_idx[2])
+    assert list(open_column(f"{export_dir}/features/lloc.npy")) == [1, 2, 3]
+    assert export(db_file, export_dir) == 0
+    main([db_file, export_dir, "--full"])
+    assert list(open_column(f"{export_dir}/features/lloc.npy")) == [1, 2, 3]
@@ -1,12 +1,20 @@
+import os
 import ast
 import sys
+import time
 import radon
 import pytest
 import sqlite3
 
+from array import array
+from types import SimpleNamespace
+from pytest_cannier import features
+from pytest_cannier.rerun import RerunPlugin
+from pytest_cannier.series import Series, decode_series
 from pytest_cannier.features import (
     get_coverage_feats, get_tree_depth, get_external_modules, 
-    get_unindented_source, FeaturesPlugin
+    get_unindented_source, get_covered_files, get_imported_files, 
+    ChurnIndex, FeaturesPlugin
 )
 
 
@@ -40,15 +48,48 @@ def test_get_coverage_feats():
     test_files = {"foo.py", "bar.py"}
 
     churn = {
-        "foo.py": {1: 1, 2: 1, 3: 1},
-        "bar.py": {2: 2, 4: 2, 6: 2},
-        "baz.py": {3: 3, 6: 3, 9: 3},
-        "bar.js": {4: 4, 8: 4, 12: 4}
+        "foo.py": array("i", [0, 1, 1, 1]),
+        "bar.py": array("i", [0, 0, 2, 0, 2, 0, 2]),
+        "baz.py": array("i", [0, 0, 0, 3, 0, 0, 3, 0, 0, 3]),
+        "bar.js": array("i", [0, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 4])
     }
 
     assert get_coverage_feats(coverage, test_files, churn) == (16, 8, 7)
 
 
+def test_get_covered_files():
+    coverage = MockCoverage({os.path.abspath("foo.py"): [1], "bar.py": []})
+    assert get_covered_files(coverage) == ["foo.py"]
+
+
+def test_get_imported_files(monkeypatch, tmpdir):
+    for file_name, source in [
+        ("cannier_state.py", "FLAG = []\n"),
+        ("cannier_helper.py", "from cannier_state import FLAG\n"),
+        ("cannier_other.py", "import os\n"),
+        ("test_cannier.py", "def test_foo():\n    import cannier_helper\n")
+    ]:
+        tmpdir.join(file_name).write(source)
+
+    monkeypatch.chdir(tmpdir)
+    monkeypatch.syspath_prepend(tmpdir.strpath)
+
+    module_names = [
+        "cannier_state", "cannier_helper", "cannier_other", "test_cannier"
+    ]
+
+    try:
+        for module_name in module_names[1:]:
+            __import__(module_name)
+
+        assert get_imported_files(
+            sys.modules["test_cannier"], tmpdir.strpath
+        ) == {"test_cannier.py", "cannier_helper.py", "cannier_state.py"}
+    finally:
+        for module_name in module_names:
+            sys.modules.pop(module_name, None)
+
+
 @pytest.mark.parametrize(
     "source,expected", 
     [
@@ -147,10 +188,75 @@ def test_load_from_db(db_file):
     with sqlite3.connect(db_file) as con:
         plugin.load_from_db(con.cursor())
 
-    assert plugin.churn == {
-        "foo.py": {1: 1, 2: 2, 3: 3},
-        "bar.py": {4: 1, 5: 2, 6: 3}
-    }
+    assert plugin.churn.file_ids == {"foo.py": 1, "bar.py": 2}
+    assert plugin.churn.lines == {}
+    assert plugin.churn.get("foo.py") == array("i", [0, 1, 2, 3])
+    assert plugin.churn.get("bar.py") == array("i", [0, 0, 0, 0, 1, 2, 3])
+    assert plugin.churn.get("baz.py") is None
+
+
+def test_churn_index_warm(db_file):
+    with sqlite3.connect(db_file) as con:
+        con.execute(
+            "insert into file "
+            "values (1, 'foo.py')"
+        )
+
+        con.execute(
+            "insert into line "
+            "values (1, 2, 5)"
+        )
+
+    churn = ChurnIndex(db_file, {"foo.py": 1})
+    pid = os.fork()
+
+    if pid == 0:
+        churn.get("foo.py")
+        os._exit(0)
+
+    os.waitpid(pid, 0)
+    assert churn.lines == {}
+    churn.warm()
+    assert churn.lines == {"foo.py": array("i", [0, 0, 5])}
+    assert churn.flags[:1] == b"\x02"
+
+
+def test_load_from_db_budget(db_file):
+    rerun = RerunPlugin(db_file, "baseline")
+    rerun.executed = {"test_foo", "test_bar"}
+    rerun.durations = {"test_foo": [1, 2, 3], "test_bar": [0, 1, 0]}
+
+    with sqlite3.connect(db_file) as con:
+        rerun.save_to_db(con.cursor())
+
+        con.execute(
+            "update item "
+            "set n_runs_features = 2 "
+            "where nodeid = 'test_bar'"
+        )
+
+    plugin = FeaturesPlugin(db_file, None, budget=10)
+
+    with sqlite3.connect(db_file) as con:
+        plugin.load_budget(con.cursor(), ["test_foo"])
+
+    assert plugin.n_runs == {"test_foo": 0}
+    assert plugin.durations == {"test_foo": 6}
+
+    with sqlite3.connect(db_file) as con:
+        plugin.load_budget(
+            con.cursor(), ["test_foo", "test_bar", "test_baz"]
+        )
+
+    assert plugin.n_runs == {"test_foo": 0, "test_bar": 2}
+    assert plugin.durations == {"test_foo": 6, "test_bar": 1}
+
+    plugin.deadline = time.monotonic() + 5
+    assert plugin.fits_budget(SimpleNamespace(nodeid="test_bar"))
+    assert plugin.fits_budget(SimpleNamespace(nodeid="test_baz"))
+    assert not plugin.fits_budget(SimpleNamespace(nodeid="test_foo"))
+    plugin.overhead = 5
+    assert not plugin.fits_budget(SimpleNamespace(nodeid="test_baz"))
 
 
 def test_save_to_db(db_file):
@@ -230,6 +336,163 @@ def test_save_to_db(db_file):
         }
 
 
+def test_save_to_db_truncated(db_file):
+    plugin = FeaturesPlugin(db_file, None, budget=10)
+    plugin.features = {"test_foo": [0] * 18}
+    plugin.truncated = True
+
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+        plugin.save_to_db(cur)
+
+        cur.execute(
+            "select count_features "
+            "from counters"
+        )
+
+        assert cur.fetchone()[0] == 0
+
+        cur.execute(
+            "select nodeid, n_runs_features "
+            "from item"
+        )
+
+        assert cur.fetchall() == [("test_foo", 1)]
+
+
+def test_save_to_db_slowdown(db_file):
+    plugin = FeaturesPlugin(db_file, None, split_tracing=True)
+    plugin.features = {"test_foo": [0] * 18, "test_bar": [1] * 18}
+    plugin.slowdowns = {"test_foo": 2.0, "test_bar": 1.0}
+
+    with sqlite3.connect(db_file) as con:
+        plugin.save_to_db(con.cursor())
+
+    plugin.slowdowns = {"test_foo": 4.0}
+
+    with sqlite3.connect(db_file) as con:
+        plugin.save_to_db(con.cursor())
+
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+
+        cur.execute(
+            "select nodeid, n_samples, mean_slowdown "
+            "from slowdown join item on item.id = slowdown.item_id"
+        )
+
+        assert set(cur.fetchall()) == {
+            ("test_foo", 2, 3.0),
+            ("test_bar", 1, 1.0)
+        }
+
+
+def test_save_to_db_series(db_file):
+    plugin = FeaturesPlugin(db_file, None, series_size=4)
+    plugin.features = {"test_foo": [0] * 18, "test_bar": [1] * 18}
+    series = Series(4)
+
+    for sample in [[1, 0, 10], [1, 0, 30], [2, 1, 20]]:
+        series.append(sample)
+
+    plugin.series = {"test_foo": series.encode()}
+
+    with sqlite3.connect(db_file) as con:
+        plugin.save_to_db(con.cursor())
+
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+
+        cur.execute(
+            "select nodeid, n_samples, samples, slope, time_to_peak, interval "
+            "from series join item on item.id = series.item_id"
+        )
+
+        (nodeid, n_samples, samples, slope, time_to_peak, interval), = (
+            cur.fetchall()
+        )
+
+    assert nodeid == "test_foo"
+    assert [c.tolist() for c in decode_series(samples, n_samples)] == [
+        [1, 1, 2], [0, 0, 1], [10, 30, 20]
+    ]
+
+    assert time_to_peak == interval
+    assert slope == pytest.approx(5 / interval)
+
+
+def test_save_to_db_incremental(db_file):
+    plugin = FeaturesPlugin(db_file, None, incremental=True)
+    plugin.features = {"test_foo": [0] * 18, "test_bar": [1] * 18}
+    plugin.covered = {"test_foo": ["foo.py", "src.py"], "test_bar": ["bar.py"]}
+    plugin.revision = "a"
+
+    with sqlite3.connect(db_file) as con:
+        plugin.save_to_db(con.cursor())
+
+    plugin = FeaturesPlugin(db_file, None, incremental=True)
+
+    with sqlite3.connect(db_file) as con:
+        plugin.load_from_db(con.cursor())
+
+    assert plugin.measured == {
+        "test_foo": ("a", {"foo.py", "src.py"}),
+        "test_bar": ("a", {"bar.py"})
+    }
+
+    plugin.features = {"test_foo": [2] * 18}
+    plugin.covered = {"test_foo": ["foo.py"]}
+    plugin.carried = {"test_bar"}
+    plugin.revision = "b"
+
+    with sqlite3.connect(db_file) as con:
+        plugin.save_to_db(con.cursor())
+
+    plugin = FeaturesPlugin(db_file, None, incremental=True)
+
+    with sqlite3.connect(db_file) as con:
+        plugin.load_from_db(con.cursor())
+        cur = con.cursor()
+
+        cur.execute(
+            "select nodeid, n_runs_features, read_count "
+            "from features join item on item.id = features.item_id"
+        )
+
+        assert sorted(cur.fetchall()) == [
+            ("test_bar", 2, 1), ("test_bar", 2, 1), 
+            ("test_foo", 2, 0), ("test_foo", 2, 2)
+        ]
+
+    assert plugin.measured == {
+        "test_foo": ("b", {"foo.py"}),
+        "test_bar": ("b", {"bar.py"})
+    }
+
+
+def test_select_carried(monkeypatch):
+    changed = {"a": {"src.py"}, "b": set()}
+    monkeypatch.setattr(features, "get_revision", lambda: "c")
+    monkeypatch.setattr(features, "get_changed_files", changed.get)
+    plugin = FeaturesPlugin(None, None, incremental=True)
+
+    plugin.measured = {
+        "test_foo": ("a", {"src.py"}),
+        "test_bar": ("a", {"bar.py"}),
+        "test_baz": ("b", set()),
+        "test_qux": ("d", set())
+    }
+
+    items = [
+        SimpleNamespace(nodeid=nodeid, location=(nodeid + ".py", 0, nodeid))
+        for nodeid in ["test_foo", "test_bar", "test_baz", "test_qux", "new"]
+    ]
+
+    plugin.select_carried(items)
+    assert plugin.carried == {"test_bar", "test_baz"}
+    assert plugin.revision == "c"
+
+
 def test_get_unindented_source():
     lines1 = [
         "    foo\n", 
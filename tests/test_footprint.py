@@ -0,0 +1,79 @@
+import os
+
+from pytest_cannier.footprint import (
+    encode_tokens, decode_tokens, footprints_overlap, FootprintRecorder
+)
+
+
+STATE = []
+CACHE = {"k": 0}
+
+
+class Settings:
+    def __init__(self):
+        self.debug = False
+
+
+SETTINGS = Settings()
+
+
+def test_encode_decode_tokens():
+    assert decode_tokens(encode_tokens(set())) == set()
+    assert decode_tokens(encode_tokens({"g:foo.bar", "e:BAZ"})) == {
+        "g:foo.bar", "e:BAZ"
+    }
+
+
+def test_footprints_overlap():
+    reads = {"n:bar", "n:Qux", "e:BAZ", "f:foo.txt", "m:foo", "n:numpy"}
+    assert footprints_overlap({"g:foo.bar"}, reads)
+    assert footprints_overlap({"c:foo.Qux.quux"}, {"n:quux"})
+    assert footprints_overlap({"e:BAZ"}, reads)
+    assert footprints_overlap({"f:foo.txt"}, reads)
+    assert footprints_overlap({"m:foo"}, reads)
+    assert footprints_overlap({"m:numpy.linalg"}, reads)
+    assert not footprints_overlap({"g:foo.baz", "e:BAR", "f:bar.txt"}, reads)
+    assert not footprints_overlap(set(), reads)
+
+
+def pollute():
+    STATE.append(1)
+    os.environ["CANNIER_FOOTPRINT"] = "1"
+
+
+def check():
+    assert not STATE
+    assert "CANNIER_FOOTPRINT" not in os.environ
+
+
+def test_footprint_recorder():
+    recorder = FootprintRecorder()
+    recorder.start()
+    pollute()
+    writes, reads = recorder.stop()
+    del os.environ["CANNIER_FOOTPRINT"]
+    STATE.clear()
+    assert f"g:{__name__}.STATE" in writes
+    assert "e:CANNIER_FOOTPRINT" in writes
+    assert f"m:{__name__}" in reads
+    recorder.start()
+    check()
+    writes, reads = recorder.stop()
+    assert writes == set()
+    assert "n:STATE" in reads
+    assert "e:CANNIER_FOOTPRINT" in reads
+
+
+def test_footprint_recorder_mutation():
+    recorder = FootprintRecorder()
+    recorder.start()
+    SETTINGS.debug = True
+    CACHE["k"] = 1
+    writes, _ = recorder.stop()
+    SETTINGS.debug = False
+    CACHE["k"] = 0
+    assert f"g:{__name__}.SETTINGS" in writes
+    assert f"g:{__name__}.CACHE" in writes
+    recorder.start()
+    writes, _ = recorder.stop()
+    assert writes == set()
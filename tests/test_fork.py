@@ -0,0 +1,33 @@
+import gc
+import os
+
+from pytest_cannier.fork import PageCounter, prepare_fork
+
+
+def test_prepare_fork():
+    prepare_fork()
+
+    try:
+        assert not gc.isenabled()
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+        gc.enable()
+
+
+def test_page_counter():
+    pages = PageCounter(2)
+    pages.collect(0)
+    assert pages.counts == []
+    pid = os.fork()
+
+    if pid == 0:
+        pages.record(1)
+        os._exit(0)
+
+    os.waitpid(pid, 0)
+    pages.collect(1)
+    assert len(pages.counts) == 1 and pages.counts[0] > 0
+    assert pages.results.read(1) is None
+    assert "1 child processes" in pages.get_summary()
+    pages.close()
@@ -0,0 +1,51 @@
+import sys
+import pytest
+import subprocess as sp
+
+from types import SimpleNamespace
+
+from pytest_cannier import get_plugin
+
+
+HEAVY_MODULES = {
+    "coverage", "psutil", "radon", "multiprocessing", "distutils", "sqlite3",
+    "pytest_cannier.features", "pytest_cannier.victim", 
+    "pytest_cannier.rerun", "pytest_cannier.isolated"
+}
+
+
+def get_import_times(source):
+    proc = sp.run(
+        [sys.executable, "-X", "importtime", "-c", source], 
+        stdout=sp.PIPE, stderr=sp.PIPE, check=True, universal_newlines=True
+    )
+
+    import_times = {}
+
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, module_name = line.split("|")
+
+        if cumulative.strip().isdigit():
+            import_times[module_name.strip()] = int(cumulative)
+
+    return import_times
+
+
+def test_import_time():
+    import_times = get_import_times("import pytest; import pytest_cannier")
+    assert "pytest_cannier" in import_times
+    assert not HEAVY_MODULES.intersection(import_times)
+
+
+@pytest.mark.parametrize("mode", ["victim", "victims"])
+def test_get_plugin_victim_workers(mode):
+    options = {"test-timeout": None, "fork-stats": False, "victim-workers": 0}
+    config = SimpleNamespace(getoption=options.get)
+
+    with pytest.raises(pytest.exit.Exception) as excinfo:
+        get_plugin(config, mode, None)
+
+    assert excinfo.value.returncode == pytest.ExitCode.USAGE_ERROR
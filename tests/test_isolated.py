@@ -0,0 +1,49 @@
+import sqlite3
+
+from pytest_cannier.isolated import IsolatedPlugin
+
+
+def test_save_to_db(db_file):
+    plugin = IsolatedPlugin(db_file, 10)
+    plugin.executed = {"test_foo": 10, "test_bar": 8}
+    plugin.failed = {"test_foo": 3}
+    plugin.timeouts = {"test_qux": 1}
+
+    with sqlite3.connect(db_file) as con:
+        plugin.save_to_db(con.cursor())
+
+    plugin.executed = {"test_foo": 10, "test_baz": 10}
+    plugin.failed = {"test_baz": 1}
+    plugin.timeouts = {"test_qux": 2}
+
+    with sqlite3.connect(db_file) as con:
+        plugin.save_to_db(con.cursor())
+
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+
+        cur.execute(
+            "select count_isolated "
+            "from counters"
+        )
+
+        assert cur.fetchone()[0] == 2
+
+        cur.execute(
+            "select nodeid, n_runs_isolated, n_fail_isolated, n_runs_baseline "
+            "from item"
+        )
+
+        assert set(cur.fetchall()) == {
+            ("test_foo", 20, 3, 0),
+            ("test_bar", 8, 0, 0),
+            ("test_baz", 10, 1, 0),
+            ("test_qux", 0, 0, 0),
+        }
+
+        cur.execute(
+            "select nodeid, mode, n_timeouts "
+            "from timeout join item on item.id = timeout.item_id"
+        )
+
+        assert cur.fetchall() == [("test_qux", "isolated", 3)]
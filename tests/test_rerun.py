@@ -1,5 +1,7 @@
 import sqlite3
 
+from types import SimpleNamespace
+
 from pytest_cannier.rerun import RerunPlugin
 
 
@@ -56,4 +58,96 @@ def test_save_to_db(db_file):
             ("test_foo", 1, 1, 1, 0),
             ("test_bar", 1, 0, 1, 1),
             ("test_baz", 0, 0, 1, 0),
-        }
\ No newline at end of file
+        }
+
+
+def test_save_to_db_durations(db_file):
+    plugin = RerunPlugin(db_file, "baseline")
+    plugin.executed = {"test_foo", "test_bar"}
+    plugin.durations = {"test_foo": [1, 2, 3], "test_bar": [0, 1, 0]}
+
+    with sqlite3.connect(db_file) as con:
+        plugin.save_to_db(con.cursor())
+
+    plugin.executed = {"test_foo"}
+    plugin.durations = {"test_foo": [3, 4, 1]}
+
+    with sqlite3.connect(db_file) as con:
+        plugin.save_to_db(con.cursor())
+
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+
+        cur.execute(
+            "select nodeid, n_samples, mean_setup, max_setup, mean_call, "
+            "max_call, mean_teardown, max_teardown "
+            "from duration join item on item.id = duration.item_id"
+        )
+
+        assert set(cur.fetchall()) == {
+            ("test_foo", 2, 2, 3, 3, 4, 2, 3),
+            ("test_bar", 1, 0, 0, 1, 1, 0, 0),
+        }
+
+
+def make_report(nodeid, when, outcome, duration=1.0):
+    return SimpleNamespace(
+        nodeid=nodeid, when=when, duration=duration,
+        skipped=outcome == "skipped", failed=outcome == "failed"
+    )
+
+
+def test_logreport(db_file):
+    plugin = RerunPlugin(db_file, "baseline")
+
+    for report in [
+        make_report("test_foo", "setup", "passed", 0.5),
+        make_report("test_bar", "setup", "skipped"),
+        make_report("test_foo", "call", "failed", 2.0),
+        make_report("test_baz", "setup", "passed"),
+        make_report("test_bar", "teardown", "passed"),
+        make_report("test_foo", "teardown", "passed", 0.25),
+        make_report("test_baz", "call", "passed"),
+        make_report("test_baz", "teardown", "failed"),
+    ]:
+        plugin.pytest_runtest_logreport(report)
+
+    assert plugin.executed == {"test_foo", "test_baz"}
+    assert plugin.failed == {"test_foo", "test_baz"}
+    assert plugin.durations["test_foo"] == [0.5, 2.0, 0.25]
+    assert plugin.running == {}
+
+
+def test_logreport_crash(db_file):
+    plugin = RerunPlugin(db_file, "baseline")
+    plugin.pytest_runtest_logreport(make_report("test_foo", "setup", "passed"))
+    plugin.pytest_runtest_logreport(make_report("test_foo", "???", "failed"))
+    assert plugin.executed == {"test_foo"}
+    assert plugin.failed == {"test_foo"}
+    assert plugin.durations == {}
+    assert plugin.running == {}
+
+
+def test_logreport_footprint(db_file):
+    plugin = RerunPlugin(db_file, "baseline", True)
+
+    for when in ["setup", "call", "teardown"]:
+        plugin.pytest_runtest_logreport(
+            make_report("test_foo", when, "passed", 1.0)
+        )
+
+    assert plugin.executed == {"test_foo"}
+    assert plugin.durations == {}
+
+
+def test_workeroutput(db_file):
+    worker = RerunPlugin(db_file, "baseline")
+    worker.footprints = {"test_foo": ({"g:foo.x"}, {"n:x", "m:foo"})}
+    workeroutput = {}
+    worker.save_to_workeroutput(workeroutput)
+    controller = RerunPlugin(db_file, "baseline")
+    controller.pytest_testnodedown(
+        SimpleNamespace(workeroutput=workeroutput), None
+    )
+
+    assert controller.footprints == worker.footprints
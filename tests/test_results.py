@@ -0,0 +1,20 @@
+import os
+
+from pytest_cannier.results import ResultTable
+
+
+def test_result_table():
+    results = ResultTable(3, "qd")
+    assert list(results) == [None, None, None]
+    results.write(0, [1, 0.5])
+    pid = os.fork()
+
+    if pid == 0:
+        results.write(2, [-3, 2.25])
+        os._exit(0)
+
+    os.waitpid(pid, 0)
+    assert list(results) == [[1, 0.5], None, [-3, 2.25]]
+    results.clear(0)
+    assert results.read(0) is None
+    results.close()
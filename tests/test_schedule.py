@@ -0,0 +1,30 @@
+import sqlite3
+
+from pytest_cannier.rerun import RerunPlugin
+from pytest_cannier.schedule import load_durations, pack_lpt
+
+
+def test_load_durations(db_file):
+    plugin = RerunPlugin(db_file, "baseline")
+    plugin.executed = {"test_foo", "test_bar"}
+    plugin.durations = {"test_foo": [1, 2, 3], "test_bar": [0, 1, 0]}
+
+    with sqlite3.connect(db_file) as con:
+        plugin.save_to_db(con.cursor())
+
+    with sqlite3.connect(db_file) as con:
+        assert load_durations(con.cursor()) == {"test_foo": 6, "test_bar": 1}
+
+
+def test_pack_lpt():
+    durations = {
+        "test_foo": 5, "test_bar": 4, "test_baz": 3, "test_qux": 3, 
+        "test_quux": 3
+    }
+
+    assert pack_lpt(durations, 2) == [
+        ["test_foo", "test_quux"], 
+        ["test_bar", "test_baz", "test_qux"]
+    ]
+
+    assert pack_lpt(durations, 6)[5] == []
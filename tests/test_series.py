@@ -0,0 +1,45 @@
+from array import array
+
+from pytest_cannier.series import (
+    Series, decode_series, encode_series, get_slope, get_time_to_peak
+)
+
+
+def test_encode_series():
+    columns = [array("q", [1, 2]), array("q", [3, 4]), array("q", [5, 6])]
+    assert decode_series(encode_series(columns), 2) == columns
+
+
+def test_get_slope():
+    assert get_slope([0, 2, 4, 6], 0.5) == 4.0
+    assert get_slope([3, 3, 3], 1.0) == 0.0
+    assert get_slope([7], 1.0) == 0.0
+
+
+def test_get_time_to_peak():
+    assert get_time_to_peak([1, 5, 2, 5], 0.25) == 0.25
+    assert get_time_to_peak([], 0.25) == 0.0
+
+
+def test_series():
+    series = Series(4)
+
+    for i in range(4):
+        series.append([1, 0, i])
+
+    assert series.n == 4
+    assert series.stride == 1
+    assert series.columns[2].tolist() == [0, 1, 2, 3]
+
+    for i in range(4, 10):
+        series.append([1, 0, 10 - i])
+
+    assert series.n == 3
+    assert series.stride == 4
+    assert series.n_raw == 10
+    assert series.columns[2][:series.n].tolist() == [3, 6, 2]
+
+    interval, n_samples, blob, slope, time_to_peak = series.encode()
+    assert n_samples == 3
+    assert decode_series(blob, n_samples)[0].tolist() == [1, 1, 1]
+    assert time_to_peak == interval
@@ -0,0 +1,99 @@
+import os
+import time
+import psutil
+import pytest
+
+from multiprocessing import Pipe
+
+from pytest_cannier import supervisor
+from pytest_cannier.supervisor import Supervisor
+
+
+def fork_child(
+    sup, result, status=0, delay=0, timeout=None, started=None
+):
+    pipe_parent, pipe_child = Pipe(duplex=False)
+    pid = os.fork()
+
+    if pid == 0:
+        time.sleep(delay)
+
+        if result is not None:
+            pipe_child.send(result)
+
+        os._exit(status)
+
+    pipe_child.close()
+    sup.add(pid, pipe_parent, timeout, started)
+    return pid
+
+
+@pytest.mark.parametrize("pidfd", [True, False])
+def test_supervisor(monkeypatch, pidfd):
+    if not pidfd:
+        monkeypatch.setattr(supervisor, "open_pidfd", lambda pid: None)
+
+    sup = Supervisor()
+    pid_foo = fork_child(sup, "foo", delay=0.2)
+    pid_bar = fork_child(sup, None, status=3)
+    pid_baz = fork_child(sup, ["baz"] * 100000)
+    finished = []
+
+    while len(finished) < 2:
+        finished += sup.wait()
+
+    assert sorted(finished) == sorted([
+        (pid_bar, 3, None), (pid_baz, 0, ["baz"] * 100000)
+    ])
+
+    assert sup.wait(0.01) == []
+    assert sup.wait() == [(pid_foo, 0, "foo")]
+    assert sup.wait() == []
+    sup.close()
+
+
+@pytest.mark.parametrize("pidfd", [True, False])
+def test_supervisor_timeout(monkeypatch, pidfd):
+    if not pidfd:
+        monkeypatch.setattr(supervisor, "open_pidfd", lambda pid: None)
+
+    sup = Supervisor()
+    pipe_parent, pipe_child = Pipe(duplex=False)
+    pid = os.fork()
+
+    if pid == 0:
+        grandchild_pid = os.fork()
+
+        if grandchild_pid == 0:
+            time.sleep(60)
+            os._exit(0)
+
+        pipe_child.send(grandchild_pid)
+        time.sleep(60)
+        os._exit(0)
+
+    pipe_child.close()
+    grandchild_pid = pipe_parent.recv()
+    sup.add(pid, pipe_parent, 0.2)
+    pid_foo = fork_child(sup, "foo")
+    assert sup.wait() == [(pid_foo, 0, "foo")]
+    start = time.monotonic()
+    assert sup.wait() == [(pid, supervisor.TIMED_OUT, None)]
+    assert time.monotonic() - start < 5
+    time.sleep(0.1)
+    assert not psutil.pid_exists(grandchild_pid) or (
+        psutil.Process(grandchild_pid).status() == psutil.STATUS_ZOMBIE
+    )
+    sup.close()
+
+
+def test_supervisor_started():
+    sup = Supervisor()
+    pid = fork_child(
+        sup, None, delay=0.5, timeout=0.2, started=time.monotonic
+    )
+
+    assert sup.wait() == [(pid, 0, None)]
+    pid = fork_child(sup, None, delay=5, timeout=0.2, started=lambda: None)
+    assert sup.wait() == [(pid, supervisor.TIMED_OUT, None)]
+    sup.close()
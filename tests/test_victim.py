@@ -1,6 +1,19 @@
+import os
+import time
+import pytest
 import sqlite3
 
-from pytest_cannier.victim import VictimPlugin
+from types import SimpleNamespace
+
+from pytest_cannier.bitmap import create_run_table, encode_bitmap
+from pytest_cannier.supervisor import TIMED_OUT
+from pytest_cannier import victim
+from pytest_cannier.victim import (
+    VictimPlugin, MultiVictimPlugin, create_probe_table, get_outcome, 
+    get_probe_key, get_shared_depth, load_candidate_ranks, PASSED, FAILED, 
+    TIMEOUT
+)
+from pytest_cannier.footprint import create_footprint_table, encode_tokens
 
 
 def test_load_from_db(db_file):
@@ -23,13 +36,14 @@ def test_load_from_db(db_file):
                 ("test_bar", 9, 10, 0, 10, 0, 0),
                 ("test_baz", 10, 9, 0, 10, 0, 0),
                 ("test_qux", 10, 10, 0, 9, 0, 0),
+                ("test_quux", 12, 10, 0, 10, 0, 0),
             ]
         )
 
     with sqlite3.connect(db_file) as con:
         plugin.load_from_db(con.cursor())
 
-    assert plugin.candidate_polluters == {"test_foo"}
+    assert plugin.candidate_polluters == {"test_foo", "test_quux"}
 
 
 def test_save_to_db(db_file):
@@ -89,4 +103,365 @@ def test_save_to_db(db_file):
             (nodeid_to_id["test_foo"], nodeid_to_id["test_bar"]),
             (nodeid_to_id["test_foo"], nodeid_to_id["test_baz"]),
             (nodeid_to_id["test_foo"], nodeid_to_id["test_qux"]),
-        }
\ No newline at end of file
+        }
+
+
+def test_load_from_db_victims(db_file):
+    plugin = MultiVictimPlugin(db_file, None)
+
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+
+        cur.executemany(
+            "insert into item "
+            "values (null, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                ("test_foo", 0, 10, 0, 10, 2, 0),
+                ("test_bar", 0, 10, 1, 10, 2, 0),
+                ("test_baz", 0, 10, 0, 10, 0, 0),
+            ]
+        )
+
+    with sqlite3.connect(db_file) as con:
+        plugin.load_from_db(con.cursor())
+
+    assert plugin.victim_nodeids == ["test_foo"]
+    plugin = MultiVictimPlugin(db_file, ["test_baz"])
+
+    with sqlite3.connect(db_file) as con:
+        plugin.load_from_db(con.cursor())
+
+    assert plugin.victim_nodeids == ["test_baz"]
+
+
+def test_save_to_db_victims(db_file):
+    plugin = MultiVictimPlugin(db_file, ["test_foo", "test_bar"])
+
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+
+        cur.executemany(
+            "insert into item "
+            "values (null, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                ("test_foo", 10, 10, 0, 10, 0, 0),
+                ("test_bar", 10, 10, 0, 10, 0, 0),
+                ("test_baz", 10, 10, 0, 10, 0, 0),
+            ]
+        )
+
+    plugin.polluters = {
+        "test_foo": {"test_bar", "test_baz"}, 
+        "test_bar": set()
+    }
+
+    with sqlite3.connect(db_file) as con:
+        plugin.save_to_db(con.cursor())
+
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+
+        cur.execute(
+            "select nodeid, n_runs_victim "
+            "from item"
+        )
+
+        assert set(cur.fetchall()) == {
+            ("test_foo", 1),
+            ("test_bar", 1),
+            ("test_baz", 0),
+        }
+
+        cur.execute(
+            "select v.nodeid, p.nodeid "
+            "from dependency "
+            "join item v on v.id = victim_id "
+            "join item p on p.id = polluter_id"
+        )
+
+        assert set(cur.fetchall()) == {
+            ("test_foo", "test_bar"),
+            ("test_foo", "test_baz"),
+        }
+
+
+def test_load_from_db_footprint(db_file):
+    plugin = VictimPlugin(db_file, "test_foo", footprint=True)
+
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+
+        cur.executemany(
+            "insert into item "
+            "values (?, ?, 0, 0, 0, 0, 0, 0)",
+            [(1, "test_foo"), (2, "test_bar"), (3, "test_baz"), (4, "test_qux")]
+        )
+
+        create_footprint_table(cur)
+
+        cur.executemany(
+            "insert into footprint "
+            "values (?, ?, ?)",
+            [
+                (1, encode_tokens(set()), encode_tokens({"n:bar"})),
+                (2, encode_tokens({"g:foo.bar"}), encode_tokens(set())),
+                (3, encode_tokens({"g:foo.baz"}), encode_tokens(set())),
+            ]
+        )
+
+    with sqlite3.connect(db_file) as con:
+        plugin.load_from_db(con.cursor())
+
+    assert plugin.candidate_polluters == {"test_bar", "test_qux"}
+
+
+def test_load_from_db_probes(monkeypatch, db_file):
+    monkeypatch.setattr(victim, "get_revision", lambda: "abc")
+    plugin = VictimPlugin(db_file, "test_foo")
+    plugin.revision = "abc"
+
+    with sqlite3.connect(db_file) as con:
+        create_probe_table(con.cursor())
+
+    for group, outcome in [([], 0), (["test_bar", "test_baz"], 1)]:
+        plugin.save_probe([SimpleNamespace(nodeid=n) for n in group], outcome)
+
+    plugin.victim_nodeid = "test_bar"
+    plugin.save_probe([], 1)
+    plugin = VictimPlugin(db_file, "test_foo")
+    plugin.revision = "abc"
+
+    with sqlite3.connect(db_file) as con:
+        plugin.load_from_db(con.cursor())
+
+    assert plugin.probes == {
+        get_probe_key([]): 0, 
+        get_probe_key([
+            SimpleNamespace(nodeid="test_bar"), 
+            SimpleNamespace(nodeid="test_baz")
+        ]): 1
+    }
+
+
+def test_load_candidate_ranks(db_file):
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+
+        cur.executemany(
+            "insert into item "
+            "values (?, ?, 0, 0, 0, 0, 0, 0)",
+            [
+                (1, "a/test_foo.py::test_foo"), 
+                (2, "a/test_foo.py::test_bar"), 
+                (3, "a/test_baz.py::test_baz"), 
+                (4, "b/test_qux.py::test_qux")
+            ]
+        )
+
+        cur.executemany(
+            "insert into features "
+            "values (?, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, ?, 0, 0, 0, 0, 0)",
+            [(2, 1), (2, 3), (3, 5)]
+        )
+
+        create_run_table(cur)
+
+        cur.executemany(
+            "insert into run "
+            "values (null, ?, ?, ?)",
+            [
+                ("shuffle", encode_bitmap([1, 2, 3, 4]), encode_bitmap([1, 4])), 
+                ("baseline", encode_bitmap([1, 2, 3, 4]), encode_bitmap([1, 3]))
+            ]
+        )
+
+        assert load_candidate_ranks(cur, "a/test_foo.py::test_foo") == {
+            "a/test_foo.py::test_foo": (0, True, True, 0),
+            "a/test_foo.py::test_bar": (0, True, True, 2),
+            "a/test_baz.py::test_baz": (0, False, True, 5),
+            "b/test_qux.py::test_qux": (1, False, False, 0)
+        }
+
+
+def test_get_outcome():
+    assert get_outcome(0, [FAILED]) == FAILED
+    assert get_outcome(TIMED_OUT, [TIMEOUT]) == TIMEOUT
+    assert get_outcome(TIMED_OUT, None) is None
+
+
+def test_get_shared_depth():
+    session, module, cls, other = object(), object(), object(), object()
+
+    def make_item(*chain):
+        item = SimpleNamespace()
+        item.listchain = lambda: [*chain, item]
+        return item
+
+    polluter = make_item(session, module, cls)
+    assert get_shared_depth(polluter, make_item(session, module, cls)) == 3
+    assert get_shared_depth(polluter, make_item(session, module)) == 2
+    assert get_shared_depth(polluter, make_item(session, other)) == 1
+    assert get_shared_depth(polluter, polluter) == 4
+
+
+def test_save_to_db_inconclusive(db_file):
+    plugin = VictimPlugin(db_file, "test_foo")
+    group = [
+        SimpleNamespace(nodeid="test_bar"), SimpleNamespace(nodeid="test_baz")
+    ]
+
+    groups = []
+    plugin.update_groups(groups, group, FAILED, None)
+    assert groups == [group[1:], group[:1]]
+    plugin.update_groups(groups, group[:1], FAILED, None)
+    assert groups == [group[1:], group[:1]]
+    assert plugin.polluters == set()
+
+    with sqlite3.connect(db_file) as con:
+        plugin.save_to_db(con.cursor())
+
+    with sqlite3.connect(db_file) as con:
+        cur = con.cursor()
+
+        cur.execute(
+            "select nodeid, mode, n_timeouts "
+            "from timeout join item on item.id = timeout.item_id"
+        )
+
+        assert set(cur.fetchall()) == {
+            ("test_bar", "victim", 1)
+        }
+
+
+def make_items(nodeids):
+    return [SimpleNamespace(nodeid=nodeid) for nodeid in nodeids]
+
+
+def test_update_groups():
+    plugin = VictimPlugin(None, "test_victim")
+    group = make_items(["test_a", "test_b", "test_c"])
+    groups = []
+    plugin.update_groups(groups, group, PASSED, PASSED)
+    assert groups == []
+    plugin.update_groups(groups, group, PASSED, FAILED)
+    assert groups == [group[1:], group[:1]]
+    assert plugin.polluters == set()
+    plugin.update_groups(groups, group[:1], PASSED, FAILED)
+    assert plugin.polluters == {"test_a"}
+    plugin.ranks = {"test_c": (1, False, False, 0)}
+    groups = []
+    plugin.update_groups(groups, group, PASSED, FAILED)
+    assert groups == [group[:1], group[1:]]
+
+
+def run_search(
+    monkeypatch, search, nodeids, polluters, n_workers=1, hangs=(), 
+    timeout=None, ranks=None
+):
+    slots = []
+    probed = []
+
+    def fork_probe(self, items, group, victim_item, slot):
+        self.results.clear(slot)
+        self.starts.clear(slot)
+        pid = os.fork()
+
+        if pid == 0:
+            for it in group:
+                self.starts.write(slot, [time.monotonic()])
+
+                if it.nodeid in hangs:
+                    time.sleep(60)
+
+            nodeids_group = {it.nodeid for it in group}
+            outcome = FAILED if polluters & nodeids_group else PASSED
+            self.results.write(slot, [outcome])
+            os._exit(0)
+
+        slots.append(slot)
+        probed.append([it.nodeid for it in group])
+
+        self.supervisor.add(
+            pid, timeout=self.timeout, started=lambda: self.get_start(slot)
+        )
+
+        return pid
+
+    monkeypatch.setattr(victim, "prepare_fork", lambda items: None)
+    monkeypatch.setattr(VictimPlugin, "fork_probe", fork_probe)
+    plugin = VictimPlugin(
+        None, "test_victim", search, n_workers, timeout=timeout
+    )
+
+    plugin.candidate_polluters = set(nodeids)
+    plugin.probes = {}
+    plugin.ranks = ranks or {}
+    items = make_items([*nodeids, "test_victim"])
+
+    with pytest.raises(pytest.exit.Exception):
+        plugin.pytest_collection_modifyitems(None, None, items)
+
+    return plugin, slots, probed
+
+
+def test_search(monkeypatch):
+    nodeids = [f"test_{i}" for i in range(8)]
+    polluters = {"test_1", "test_2", "test_6"}
+    bisect, _, _ = run_search(monkeypatch, "bisect", nodeids, polluters)
+    linear, _, _ = run_search(monkeypatch, "linear", nodeids, polluters)
+    assert bisect.polluters == linear.polluters == polluters
+
+
+def test_search_ranks(monkeypatch):
+    nodeids = [f"test_{i}" for i in range(8)]
+    polluters = {"test_1", "test_6"}
+
+    _, _, probed = run_search(
+        monkeypatch, "bisect", nodeids[::-1], polluters
+    )
+
+    _, _, probed_ranked = run_search(
+        monkeypatch, "bisect", nodeids, polluters, 
+        ranks={"test_6": (1, False, False, 0)}
+    )
+
+    assert sorted(probed) == sorted(probed_ranked)
+    assert probed[2] == ["test_0", "test_1", "test_2", "test_3"]
+    assert probed_ranked[2] == ["test_4", "test_5", "test_6", "test_7"]
+
+    _, _, probed_linear = run_search(
+        monkeypatch, "linear", nodeids, polluters, 
+        ranks={"test_6": (1, False, False, 0)}
+    )
+
+    assert probed_linear[1:3] == [["test_6"], ["test_0"]]
+
+
+def test_search_workers(monkeypatch):
+    nodeids = [f"test_{i}" for i in range(8)]
+    polluters = {"test_1", "test_2", "test_6"}
+
+    plugin, slots, _ = run_search(
+        monkeypatch, "linear", nodeids, polluters, n_workers=2
+    )
+
+    assert plugin.polluters == polluters
+    assert len(slots) == len(nodeids) + 1
+    assert slots[1:3] == [1, 0]
+    assert set(slots) == {0, 1}
+
+
+@pytest.mark.parametrize("search", ["bisect", "linear"])
+def test_search_hang(monkeypatch, search):
+    nodeids = [f"test_{i}" for i in range(7)]
+    polluters = {"test_1", "test_5"}
+    start = time.monotonic()
+
+    plugin, _, _ = run_search(
+        monkeypatch, search, nodeids, polluters, hangs={"test_3"}, 
+        timeout=0.2
+    )
+
+    assert time.monotonic() - start < 5
+    assert plugin.polluters == polluters
+    assert plugin.timeouts == {"test_3": 1}